@@ -0,0 +1,195 @@
+"""
+Bulk analysis of recorded positions on a pool of worker processes.
+
+analyze_positions() runs a strategy on every position of an archive. The
+positions are read as the work goes and deduplicated, so each distinct one
+is analysed once, and are shipped to the workers compactly: a Stonehenge
+position as its board length and its rank (see stonehenge_rank.py), a
+SubtractSquare position as its total and player to move. Each worker
+rebuilds the games it is sent from their codes, and results come back
+batch by batch as the workers finish them.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import copy
+import os
+import pickle
+import time
+from stonehenge import Stonehenge
+from stonehenge_rank import StonehengeRanker
+from stonehenge_state import StonehengeState
+from subtract_square_game import SubtractSquareGame
+from subtract_square_state import SubtractSquareState
+
+# the empty game of each board length and its ranker, built once per
+# process
+_BOARDS = {}
+
+
+def _board(length: int) -> Tuple[Stonehenge, StonehengeRanker]:
+    """
+    Return a Stonehenge game of board length length and its ranker
+    """
+    if length not in _BOARDS:
+        game = Stonehenge.from_length(length)
+        _BOARDS[length] = game, StonehengeRanker(game.current_state)
+    return _BOARDS[length]
+
+
+def encode(state: Any) -> tuple:
+    """
+    Return a small picklable description of state, the same for every
+    state of the same position
+
+    >>> encode(SubtractSquareState(False, 20))
+    ('s', 20, False)
+    """
+    if isinstance(state, StonehengeState):
+        return 'h', state.b_length, _board(state.b_length)[1].rank(state)
+    if isinstance(state, SubtractSquareState):
+        return 's', state.current_total, state.p1_turn
+    raise TypeError('cannot analyse a {}'.format(type(state).__name__))
+
+
+def decode(code: tuple) -> Any:
+    """
+    Return a game whose current state is the position code describes
+
+    >>> decode(('s', 20, False)).current_state
+    P1's Turn: False - Total: 20
+    """
+    if code[0] == 'h':
+        game, ranker = _board(code[1])
+        game = copy.copy(game)
+        game.current_state = ranker.unrank(code[2])
+        return game
+    return SubtractSquareGame.from_total(code[1], code[2])
+
+
+def _analyze_batch(strategy: Callable, batch: List[tuple]) -> List[tuple]:
+    """
+    Return (code, move, stats) for each position code in batch: the move
+    strategy picks there and the last_stats it keeps (none for a plain
+    function), with the seconds taken
+    """
+    results = []
+    for code in batch:
+        game = decode(code)
+        started = time.perf_counter()
+        move = strategy(game)
+        stats = dict(getattr(strategy, 'last_stats', {}))
+        stats['seconds'] = time.perf_counter() - started
+        results.append((code, move, stats))
+    return results
+
+
+def _read_batches(positions: Iterable[Any], batch_size: int,
+                  waiting: Dict[tuple, list], done: Dict[tuple, tuple],
+                  ready: List[tuple]) -> Iterator[List[tuple]]:
+    """
+    Yield the codes of positions not analysed before, batch_size at a
+    time, reading positions only as batches are asked for
+
+    Each position is recorded in waiting under its code until its code's
+    result comes in, or, if that result is already in done, put in ready
+    with it at once.
+    """
+    batch = []
+    for position in positions:
+        code = encode(position)
+        if code in done:
+            ready.append((position,) + done[code])
+        elif code in waiting:
+            waiting[code].append(position)
+        else:
+            waiting[code] = [position]
+            batch.append(code)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _collect(results: List[tuple], waiting: Dict[tuple, list],
+             done: Dict[tuple, tuple], ready: List[tuple]) -> None:
+    """
+    Record each (code, move, stats) of results in done, and put every
+    position waiting for it in ready with it
+    """
+    for code, move, stats in results:
+        done[code] = (move, stats)
+        ready.extend((position, move, stats)
+                     for position in waiting.pop(code))
+
+
+def analyze_positions(positions: Iterable[Any], strategy: Callable,
+                      workers: int = None, batch_size: int = 16) \
+        -> Iterator[Tuple[Any, Any, Dict[str, Any]]]:
+    """
+    Yield (position, best move, stats) for every position (a GameState) of
+    positions, as strategy finds them on workers processes (one per core
+    by default), in the order the batches finish. With workers=1
+    everything runs in this process.
+
+    positions is read as the work goes, with at most two batches per
+    worker in flight at once, so it may be a stream too large to hold in
+    memory. Positions that are the same position are analysed once; a
+    repeat of one already analysed is yielded with its result as soon as
+    it is read. Closing the generator early cancels the batches not yet
+    started.
+
+    stats are the strategy's last_stats for the position, as kept by the
+    searching strategies of game_interface.py ('smp', 'ponder', 'pvs' and
+    'mtdf', whose stats include the value they found), with the seconds
+    taken added.
+
+    Unless workers is 1, strategy is sent to the workers and so must be
+    picklable; a TypeError is raised before any work starts if it is not.
+    'ponder' is not, as it holds a thread.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers != 1:
+        try:
+            pickle.dumps(strategy)
+        except (TypeError, AttributeError, pickle.PicklingError) as error:
+            raise TypeError('cannot send the strategy to worker processes '
+                            '({}); use workers=1'.format(error)) from error
+
+    waiting, done, ready = {}, {}, []
+    batches = _read_batches(positions, batch_size, waiting, done, ready)
+    if workers == 1:
+        for batch in batches:
+            _collect(_analyze_batch(strategy, batch), waiting, done, ready)
+            yield from ready
+            ready.clear()
+        yield from ready
+        return
+
+    pool = ProcessPoolExecutor(workers)
+    running = set()
+    try:
+        for batch in batches:
+            running.add(pool.submit(_analyze_batch, strategy, batch))
+            while len(running) >= 2 * workers:
+                finished, running = wait(running,
+                                         return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _collect(future.result(), waiting, done, ready)
+            yield from ready
+            ready.clear()
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                _collect(future.result(), waiting, done, ready)
+            yield from ready
+            ready.clear()
+        yield from ready
+    finally:
+        pool.shutdown(wait=not running, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,119 @@
+"""
+Unittests for the bulk position analysis in analysis.py.
+"""
+import itertools
+import time
+import unittest
+
+from analysis import analyze_positions, decode, encode
+from pondering import PonderingStrategy
+from pvs import PVSStrategy
+from stonehenge_state_unittest import random_positions
+from strategy_unittest import StonehengeGame, SubtractSquareGame, \
+    make_game, play
+
+
+class CountingStrategy:
+    """
+    Play the first possible move, counting the positions seen.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, game):
+        self.calls += 1
+        return game.current_state.get_possible_moves()[0]
+
+
+class AnalysisUnitTests(unittest.TestCase):
+    def test_codes_round_trip(self):
+        """
+        Test that a position decodes to the same position, and that two
+        move orders reaching it encode the same way.
+        """
+        for _, state in random_positions(100, seed=12):
+            back = decode(encode(state)).current_state
+            self.assertEqual(back.key().split('|')[0],
+                             state.key().split('|')[0])
+            self.assertEqual((back.p1_score, back.p2_score, back.p1_turn),
+                             (state.p1_score, state.p2_score, state.p1_turn))
+        first = play(make_game(StonehengeGame, '3'), ['A', 'F', 'L'])
+        second = play(make_game(StonehengeGame, '3'), ['L', 'F', 'A'])
+        self.assertEqual(encode(first.current_state),
+                         encode(second.current_state))
+
+    def test_duplicates_analysed_once(self):
+        """
+        Test that every position gets a result but repeated ones are only
+        analysed once.
+        """
+        states = [s for _, s in random_positions(40, seed=13) if s.free]
+        states += states[:10]
+        counting = CountingStrategy()
+        results = list(analyze_positions(states, counting, workers=1,
+                                         batch_size=4))
+        self.assertEqual(sorted(map(id, (r[0] for r in results))),
+                         sorted(map(id, states)))
+        self.assertEqual(counting.calls, len({encode(s) for s in states}))
+
+    def test_pool_matches_direct(self):
+        """
+        Test that values found by worker processes are those the strategy
+        finds on the positions directly, for both games.
+        """
+        games = [play(make_game(StonehengeGame, '2'), moves)
+                 for moves in [[], ['A'], ['B', 'C'], ['A', 'F', 'D']]]
+        games += [make_game(SubtractSquareGame, str(n), n % 2 == 0)
+                  for n in range(5, 12)]
+        strategy = PVSStrategy()
+        expected = {id(g.current_state): strategy.analyse(g)[1]
+                    for g in games}
+        results = list(analyze_positions([g.current_state for g in games],
+                                         strategy, workers=2, batch_size=3))
+        self.assertEqual(len(results), len(games))
+        for position, move, stats in results:
+            self.assertEqual(stats['value'], expected[id(position)])
+            self.assertIn(move, position.get_possible_moves())
+            self.assertIn('seconds', stats)
+
+    def test_positions_streamed(self):
+        """
+        Test that positions are read only as batches are needed, and that
+        closing the results early stops the work without waiting for the
+        rest of an endless stream.
+        """
+        read = []
+
+        def endless():
+            for total in itertools.count(1):
+                read.append(total)
+                yield make_game(SubtractSquareGame, str(total)).current_state
+
+        results = analyze_positions(endless(), CountingStrategy(),
+                                    workers=1, batch_size=4)
+        self.assertEqual(len(list(itertools.islice(results, 3))), 3)
+        self.assertEqual(len(read), 4)
+        results.close()
+
+        del read[:]
+        results = analyze_positions(endless(), CountingStrategy(),
+                                    workers=2, batch_size=4)
+        self.assertEqual(len(list(itertools.islice(results, 10))), 10)
+        self.assertLessEqual(len(read), (2 * 2 + 3) * 4)
+        started = time.perf_counter()
+        results.close()
+        self.assertLess(time.perf_counter() - started, 5.0)
+
+    def test_unpicklable_strategy(self):
+        """
+        Test that a strategy that cannot be sent to the workers is
+        refused before any position is analysed.
+        """
+        states = [s for _, s in random_positions(5, seed=14) if s.free]
+        with self.assertRaises(TypeError):
+            list(analyze_positions(states, PonderingStrategy(), workers=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
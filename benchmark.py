@@ -0,0 +1,219 @@
+"""
+Benchmarks for the search engines.
+
+Run with `python benchmark.py [board length] [opening moves...]`; the
+default is the length-3 board after A. Results are printed as plain-text
+tables.
+"""
+from typing import Any, List
+import copy
+import os
+import random
+import sys
+import time
+from lazy_smp import LazySMPStrategy
+from linear_eval import linear_evaluation
+from pvs import MTDSearch, PVSearch
+from search import AlphaBeta
+from state_graph import StateGraph
+from stonehenge import Stonehenge
+from stonehenge_vector import random_playouts
+
+
+def make_position(length: int, moves: List[str]) -> Any:
+    """
+    Return a Stonehenge game of board length length after moves
+    """
+    game = Stonehenge.from_length(length)
+    for move in moves:
+        game.current_state = game.current_state.make_move(move)
+    return game
+
+
+def worker_counts() -> List[int]:
+    """
+    Return 1, 2, 4, ... up to the number of cores (always including it)
+    """
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def bench_lazy_smp(game: Any) -> List[tuple]:
+    """
+    Return (workers, seconds, nodes, speedup, move, depth) for a full
+    Lazy SMP solve of game with each of worker_counts() workers
+    """
+    rows = []
+    for workers in worker_counts():
+        strategy = LazySMPStrategy(workers=workers, time_limit=None)
+        started = time.perf_counter()
+        move = strategy(game)
+        seconds = time.perf_counter() - started
+        base = rows[0][1] if rows else seconds
+        rows.append((workers, seconds, strategy.last_stats['nodes'],
+                     base / seconds, move, strategy.last_stats['depth']))
+    return rows
+
+
+def bench_exact(game: Any) -> List[tuple]:
+    """
+    Return (engine, nodes, seconds, value, move, principal variation) for
+    a full solve of game by alpha-beta, PVS and MTD(f)
+    """
+    rows = []
+    for engine in (AlphaBeta(game), PVSearch(game), MTDSearch(game)):
+        started = time.perf_counter()
+        for _, value, move in engine.iterate(game.current_state):
+            pass
+        seconds = time.perf_counter() - started
+        pv = ''
+        if isinstance(engine, PVSearch):
+            pv = ' '.join(engine.principal_variation(game.current_state))
+        rows.append((type(engine).__name__, engine.nodes, seconds, value,
+                     move, pv))
+    return rows
+
+
+def sample_positions(game: Any, count: int, seed: int = 0) -> List[Any]:
+    """
+    Return count games whose current states are reached from game's by a
+    few random moves each, none of them over
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        sample = copy.copy(game)
+        for _ in range(rng.randrange(6)):
+            moves = sample.current_state.get_possible_moves()
+            child = sample.current_state.make_move(rng.choice(moves))
+            if sample.is_over(child):
+                break
+            sample.current_state = child
+        positions.append(sample)
+    return positions
+
+
+def bench_evaluation(game: Any, depths: tuple = (1, 2, 3, 4),
+                     samples: int = 100) -> List[tuple]:
+    """
+    Return (evaluation, depth, positions, wins found, nodes, seconds) for
+    PVS searches to each of depths with rough_outcome() and with
+    linear_evaluation() at the leaves, over the sampled positions from
+    game where the player to move can force a win: wins found is the
+    share of them where the search's move keeps the win
+    """
+    table = AlphaBeta(game).table
+    exact = {}
+
+    def solve(state: Any) -> int:
+        if state.key() not in exact:
+            engine = AlphaBeta(game, table)
+            for _, value, _ in engine.iterate(state):
+                pass
+            exact[state.key()] = value
+        return exact[state.key()]
+
+    won = [g for g in sample_positions(game, samples) if
+           solve(g.current_state) > 0]
+    rows = []
+    for name, evaluate in (('rough_outcome', None),
+                           ('linear', linear_evaluation)):
+        for depth in depths:
+            found, nodes = 0, 0
+            started = time.perf_counter()
+            for position in won:
+                engine = PVSearch(position, evaluate=evaluate)
+                move = None
+                for _, _, move in engine.iterate(position.current_state,
+                                                 depth):
+                    pass
+                nodes += engine.nodes
+                child = position.current_state.make_move(move)
+                found += game.is_over(child) or solve(child) < 0
+            seconds = time.perf_counter() - started
+            rows.append((name, depth, len(won), found / max(1, len(won)),
+                         nodes, seconds))
+    return rows
+
+
+def bench_state_graph(game: Any) -> List[tuple]:
+    """
+    Return (nodes, edges, build seconds, solve seconds, value, move) for
+    building and solving the state graph of game
+    """
+    graph = StateGraph(game)
+    value = graph.solve()
+    return [(graph.node_count, graph.edge_count, graph.build_seconds,
+             graph.solve_seconds, value,
+             graph.best_move(game.current_state))]
+
+
+def bench_playouts(game: Any) -> List[tuple]:
+    """
+    Return (games, seconds, games per minute, p1 wins, mean length) for
+    batches of random playouts from game's current state
+    """
+    rows = []
+    for count in (1000, 10000, 100000):
+        started = time.perf_counter()
+        winners, lengths = random_playouts(game.current_state, count, seed=0)
+        seconds = time.perf_counter() - started
+        rows.append((count, seconds, int(count * 60 / seconds),
+                     float((winners == 1).mean()), float(lengths.mean())))
+    return rows
+
+
+def print_table(title: str, header: List[str], rows: List[tuple]) -> None:
+    """
+    Print rows under header as an aligned table headed by title
+    """
+    cells = [header] + [[_format(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    print(title)
+    for row in cells:
+        print('  '.join(v.rjust(w) for v, w in zip(row, widths)))
+    print()
+
+
+def _format(value: Any) -> str:
+    """
+    Return value formatted for a table cell
+    """
+    if isinstance(value, float):
+        return '{:.3f}'.format(value)
+    return str(value)
+
+
+def main(args: List[str]) -> None:
+    """
+    Run every benchmark on the position described by args
+    """
+    length = int(args[0]) if args else 3
+    moves = args[1:] if len(args) > 1 else ['A']
+    game = make_position(length, moves)
+    print('Stonehenge, length {}, after {}\n'.format(length, ' '.join(moves)))
+    print_table('Lazy SMP scaling',
+                ['workers', 'seconds', 'nodes', 'speedup', 'move', 'depth'],
+                bench_lazy_smp(game))
+    print_table('Exact solve',
+                ['engine', 'nodes', 'seconds', 'value', 'move', 'pv'],
+                bench_exact(game))
+    print_table('Leaf evaluation',
+                ['evaluation', 'depth', 'positions', 'wins found', 'nodes',
+                 'seconds'],
+                bench_evaluation(game))
+    print_table('Random playouts',
+                ['games', 'seconds', 'per minute', 'p1 wins', 'length'],
+                bench_playouts(game))
+    print_table('State graph',
+                ['nodes', 'edges', 'build', 'solve', 'value', 'move'],
+                bench_state_graph(game))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,125 @@
+"""
+Checkpoints for long minimax solves.
+
+A Checkpoint given to iterative_minimax saves the search's progress to a
+file every interval seconds: the scores of the root moves searched so far,
+the explicit stack of the root move being searched, and the solved
+positions not yet written to the SolvedCache. A frame of the stack is
+stored as the move leading to it, its bounds and best score so far and
+the moves it has left to try; its position is rebuilt on restore by
+replaying the moves from the root. The file is gzipped JSON, replaced
+atomically, so a process killed mid-write leaves the previous checkpoint
+whole.
+
+When a search finishes, its checkpoint file is removed.
+"""
+from typing import Any, Dict, List
+import gzip
+import json
+import os
+import time
+
+
+class Checkpoint:
+    """
+    Where and how often a minimax search saves its progress.
+
+    path: the checkpoint file
+    interval: the seconds between saves
+    saves: the number of saves made
+    result: the (score, move) of the root once the search is over (or
+            was answered from the SolvedCache), else None
+    """
+    path: str
+    interval: float
+    saves: int
+    result: Any
+
+    def __init__(self, path: str, interval: float = 60.0) -> None:
+        """
+        Initialize a checkpoint saved to path every interval seconds
+        """
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self.result = None
+        self._root = None
+        self._moves = None
+        self._scores = None
+        self._pending = {}
+        self._last = time.monotonic()
+
+    def restore(self, game: Any) -> Any:
+        """
+        Return what was saved of a search of game's current state, as a
+        dict of its root scores, stack frames and pending solved
+        positions, or None if nothing was
+        """
+        if not os.path.exists(self.path):
+            return None
+        with gzip.open(self.path, 'rt') as f:
+            saved = json.load(f)
+        if saved['root'] != game.current_state.key():
+            return None
+        saved['pending'] = {key: (value, move)
+                            for key, value, move in saved['pending']}
+        return saved
+
+    def begin(self, game: Any, moves: List[Any], scores: List[int],
+              pending: Dict[Any, tuple]) -> None:
+        """
+        Start checkpointing a search of game's current state, whose root
+        moves are moves, whose root scores so far are kept in scores and
+        whose solved positions not yet in the SolvedCache are kept in
+        pending, mapping key() to (score, move)
+        """
+        self._root = game.current_state.key()
+        self._moves = moves
+        self._scores = scores
+        self._pending = pending
+        self._last = time.monotonic()
+
+    def tick(self, stack: List[Any]) -> None:
+        """
+        Save the search with explicit stack if the interval has passed
+        since the last save
+        """
+        if time.monotonic() - self._last >= self.interval:
+            self.save(stack)
+
+    def save(self, stack: List[Any]) -> None:
+        """
+        Write the search with explicit stack to the checkpoint file
+        """
+        frames = []
+        for frame in stack:
+            moves = list(frame.moves)
+            frame.moves = iter(moves)
+            frames.append({'move': frame.move, 'score': frame.score,
+                           'best_move': frame.best_move,
+                           'alpha': frame.alpha, 'beta': frame.beta,
+                           'floor': frame.floor, 'moves': moves})
+        saved = {'root': self._root, 'scores': self._scores,
+                 'frames': frames,
+                 'pending': [[key, value, move] for key, (value, move)
+                             in self._pending.items()]}
+        temporary = self.path + '.tmp'
+        with gzip.open(temporary, 'wt') as f:
+            json.dump(saved, f, separators=(',', ':'))
+        os.replace(temporary, self.path)
+        self.saves += 1
+        self._last = time.monotonic()
+
+    def finish(self, score: int, move: Any) -> None:
+        """
+        Record the result of the finished search and remove the
+        checkpoint file
+        """
+        self.result = (score, move)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
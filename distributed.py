@@ -0,0 +1,406 @@
+"""
+Solving one position on many machines.
+
+A Coordinator expands the position split_depth plies deep and hands the
+positions it reaches, one per task, to workers that connect to it over
+TCP. A worker solves each task it gets with a full alpha-beta search and
+sends back the score and best move. Once every task is back, the
+coordinator backs the scores up to the root and writes every position it
+solved into a SolvedCache.
+
+Workers and the coordinator exchange JSON objects, one per line. A worker
+asks for work with {"type": "request"} and is answered with a task
+({"type": "task", "id": ..., "position": ...}, the position encoded as in
+analysis.py), {"type": "wait"} while the last tasks are out with other
+workers, or {"type": "done"}. It answers a task with {"type": "result",
+"id": ..., "score": ..., "move": ...}. A task is leased to its worker for
+lease seconds; a task not back by then, or whose worker disconnects, is
+handed to the next worker that asks, and whichever result arrives first
+is kept.
+
+Scores are those of strategy.py, for the player to move: WIN_SCORE less
+the plies to the end for a win and its negative for a loss.
+
+Run `python distributed.py coordinator LENGTH [--depth D] [--port P]
+[--cache FILE]` on one host and `python distributed.py worker HOST PORT`
+on as many as you like. The coordinator listens on 127.0.0.1 unless given
+--host; the protocol has no authentication, so only open it to other
+machines (with --host 0.0.0.0, say) on a network you trust.
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import collections
+import json
+import socket
+import socketserver
+import threading
+import time
+from analysis import decode, encode
+from search import MATE_BOUND, WIN, AlphaBeta
+from solved_cache import SolvedCache
+from stonehenge import Stonehenge
+from strategy import WIN_SCORE, state_score
+
+
+def _send(stream: Any, message: dict) -> None:
+    """
+    Write message to stream as one line of JSON
+    """
+    stream.write(json.dumps(message).encode() + b'\n')
+    stream.flush()
+
+
+def _receive(stream: Any) -> Any:
+    """
+    Return the next message on stream, or None once it is closed
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def solve_task(game: Any) -> Tuple[int, Any]:
+    """
+    Return the score and best move of game's current state, searched to
+    the end
+
+    >>> from analysis import decode
+    >>> solve_task(decode(('s', 5, True)))
+    (-9998, 1)
+    """
+    value, move = 0, None
+    for _, value, move in AlphaBeta(game).iterate(game.current_state):
+        pass
+    # from search.py's scale (WIN less the plies) to strategy.py's
+    if value > MATE_BOUND:
+        value = WIN_SCORE - (WIN - value)
+    elif value < -MATE_BOUND:
+        value = -WIN_SCORE + (WIN + value)
+    return value, move
+
+
+class _Node:
+    """
+    A position the coordinator expanded or scored itself.
+
+    state: the position
+    children: (move, key of the child) for every move, if expanded
+    score: its score, once known
+    move: its best move, once known
+    """
+    state: Any
+    children: List[Tuple[Any, Any]]
+    score: Any
+    move: Any
+
+    def __init__(self, state: Any) -> None:
+        """
+        Initialize an unscored node for state
+        """
+        self.state = state
+        self.children = []
+        self.score = None
+        self.move = None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+    Serves one worker's connection.
+    """
+
+    def handle(self) -> None:
+        """
+        Answer the worker's messages until it disconnects, then hand back
+        whatever it still holds
+        """
+        coordinator = self.server.coordinator
+        held = set()
+        try:
+            while True:
+                message = _receive(self.rfile)
+                if message is None:
+                    break
+                if message['type'] == 'result':
+                    # ignore results for tasks that were never handed out
+                    if not isinstance(message['id'], int) \
+                            or message['id'] not in coordinator.tasks:
+                        continue
+                    held.discard(message['id'])
+                    coordinator.record(message['id'], message['score'],
+                                       message['move'])
+                    continue
+                reply = coordinator.assign()
+                if reply['type'] == 'task':
+                    held.add(reply['id'])
+                _send(self.wfile, reply)
+        except (OSError, ValueError):
+            pass
+        finally:
+            coordinator.release(held)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    """
+    The coordinator's server, one thread per worker.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """
+    Hands out the positions split_depth plies below a root to workers and
+    puts their results together.
+
+    game: the game whose current state is solved
+    split_depth: the plies below the root at which tasks are cut
+    lease: the seconds a worker has to return a task before it is handed
+           to another
+    address: the (host, port) workers connect to
+    tasks: the encoded position of every task, by id
+    reassigned: the number of times a task was handed out again
+    """
+    game: Any
+    split_depth: int
+    lease: float
+    address: Tuple[str, int]
+    tasks: Dict[int, tuple]
+    reassigned: int
+
+    def __init__(self, game: Any, split_depth: int = 2, lease: float = 60.0,
+                 host: str = '127.0.0.1', port: int = 0) -> None:
+        """
+        Split game's current state into tasks and listen on host and port
+        (any free port if 0)
+        """
+        self.game = game
+        self.split_depth = split_depth
+        self.lease = lease
+        self.reassigned = 0
+        self._nodes = {}
+        self._root = self._expand(game.current_state, split_depth)
+
+        codes = {}
+        for key, node in self._nodes.items():
+            if node.score is None and not node.children:
+                codes.setdefault(encode(node.state), []).append(key)
+        self.tasks = dict(enumerate(codes))
+        self._task_nodes = {i: codes[code] for i, code in self.tasks.items()}
+        self._pending = collections.deque(self.tasks)
+        self._leased = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self.tasks:
+            self._finished.set()
+
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self
+        self.address = self._server.server_address[:2]
+        self._thread = None
+
+    def _expand(self, state: Any, depth: int) -> Any:
+        """
+        Add state and the positions up to depth plies below it to the
+        tree, scoring those that are over, and return its key
+
+        Positions whose winner is already decided are expanded or handed
+        out like any other: only a search gives their distance to the end.
+        """
+        key = state.key()
+        if key in self._nodes:
+            return key
+        node = _Node(state)
+        self._nodes[key] = node
+        score = state_score(self.game, state)
+        if score is not None:
+            node.score = score * WIN_SCORE
+        elif depth > 0:
+            node.children = [(move, self._expand(state.make_move(move),
+                                                 depth - 1))
+                             for move in state.get_possible_moves()]
+        return key
+
+    def start(self) -> None:
+        """
+        Start accepting workers in the background
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def assign(self) -> dict:
+        """
+        Return the reply to a worker asking for work, leasing it a task if
+        there is one
+        """
+        with self._lock:
+            now = time.monotonic()
+            for task, deadline in list(self._leased.items()):
+                if deadline <= now:
+                    del self._leased[task]
+                    self._pending.append(task)
+                    self.reassigned += 1
+            if self._pending:
+                task = self._pending.popleft()
+                self._leased[task] = now + self.lease
+                return {'type': 'task', 'id': task,
+                        'position': self.tasks[task]}
+            if self._leased:
+                return {'type': 'wait'}
+            return {'type': 'done'}
+
+    def record(self, task: int, score: int, move: Any) -> None:
+        """
+        Record a worker's score and best move for task, unless there is no
+        such task
+        """
+        if task not in self.tasks:
+            return
+        with self._lock:
+            self._leased.pop(task, None)
+            if task in self._pending:
+                self._pending.remove(task)
+            if task in self._results:
+                return
+            self._results[task] = (score, move)
+            if len(self._results) == len(self.tasks):
+                self._finished.set()
+
+    def release(self, tasks: Any) -> None:
+        """
+        Hand the tasks a disconnected worker held to the next worker
+        """
+        with self._lock:
+            for task in tasks:
+                if task in self._leased:
+                    del self._leased[task]
+                    self._pending.appendleft(task)
+                    self.reassigned += 1
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait up to timeout seconds for every task to be solved, returning
+        whether they are
+        """
+        return self._finished.wait(timeout)
+
+    def result(self, cache: SolvedCache = None) -> Tuple[int, Any]:
+        """
+        Return the score and best move of the root once every task is
+        solved, first writing every solved position to cache if given
+        """
+        for task, keys in self._task_nodes.items():
+            for key in keys:
+                self._nodes[key].score, self._nodes[key].move = \
+                    self._results[task]
+        self._back_up(self._root)
+        if cache is not None:
+            cache.put_many((key, node.score, node.move)
+                           for key, node in self._nodes.items()
+                           if node.move is not None)
+        root = self._nodes[self._root]
+        return root.score, root.move
+
+    def _back_up(self, key: Any) -> int:
+        """
+        Return the score of the node with key, computing the scores of
+        the expanded nodes from their children
+        """
+        node = self._nodes[key]
+        if node.score is None:
+            for move, child in node.children:
+                score = -self._back_up(child)
+                # one ply further from the end
+                score -= (score > 0) - (score < 0)
+                if node.score is None or score > node.score:
+                    node.score, node.move = score, move
+        return node.score
+
+    def close(self) -> None:
+        """
+        Stop accepting workers
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def solve(self, cache: SolvedCache = None,
+              timeout: float = None) -> Tuple[int, Any]:
+        """
+        Serve workers until every task is solved and return the root's
+        score and best move, writing the solved positions to cache
+
+        Raise a TimeoutError if that takes more than timeout seconds.
+        """
+        self.start()
+        try:
+            if not self.wait(timeout):
+                raise TimeoutError('{} of {} tasks still unsolved'.format(
+                    len(self.tasks) - len(self._results), len(self.tasks)))
+        finally:
+            self.close()
+        return self.result(cache)
+
+
+def run_worker(host: str, port: int, retry: float = 0.2) -> int:
+    """
+    Solve the tasks of the coordinator at host and port until it has none
+    left, waiting retry seconds whenever all its tasks are out, and
+    return the number of tasks solved
+    """
+    solved = 0
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile('rwb')
+        while True:
+            _send(stream, {'type': 'request'})
+            message = _receive(stream)
+            if message is None or message['type'] == 'done':
+                return solved
+            if message['type'] == 'wait':
+                time.sleep(retry)
+                continue
+            score, move = solve_task(decode(message['position']))
+            _send(stream, {'type': 'result', 'id': message['id'],
+                           'score': score, 'move': move})
+            solved += 1
+
+
+def main(args: List[str] = None) -> None:
+    """
+    Run a coordinator or a worker as args say
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    modes = parser.add_subparsers(dest='mode', required=True)
+    coordinator = modes.add_parser('coordinator')
+    coordinator.add_argument('length', type=int)
+    coordinator.add_argument('--depth', type=int, default=2)
+    coordinator.add_argument('--host', default='127.0.0.1')
+    coordinator.add_argument('--port', type=int, default=5555)
+    coordinator.add_argument('--lease', type=float, default=600.0)
+    coordinator.add_argument('--cache', default=None)
+    worker = modes.add_parser('worker')
+    worker.add_argument('host')
+    worker.add_argument('port', type=int)
+    options = parser.parse_args(args)
+
+    if options.mode == 'worker':
+        print('Solved {} tasks'.format(run_worker(options.host,
+                                                  options.port)))
+        return
+    game = Stonehenge.from_length(options.length)
+    server = Coordinator(game, options.depth, options.lease, options.host,
+                         options.port)
+    print('{} tasks, listening on {}:{}'.format(len(server.tasks),
+                                                *server.address))
+    cache = SolvedCache(options.cache) if options.cache else None
+    score, move = server.solve(cache)
+    if cache is not None:
+        cache.close()
+    print('Score {} for the player to move, best move {}'.format(score, move))
+
+
+if __name__ == '__main__':
+    main()
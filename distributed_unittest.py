@@ -0,0 +1,131 @@
+"""
+Unittests for distributed solving in distributed.py, with the coordinator
+and its workers on localhost.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from distributed import Coordinator, run_worker
+from solved_cache import SolvedCache
+from strategy import recursive_helper
+from strategy_unittest import StonehengeGame, SubtractSquareGame, \
+    exact_score, make_game, play
+
+
+def vanishing_worker(host, port, linger, holding):
+    """
+    Take a task from the coordinator at host and port, set holding, keep
+    the task for linger seconds without answering, then disconnect.
+    """
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile('rwb')
+        stream.write(json.dumps({'type': 'request'}).encode() + b'\n')
+        stream.flush()
+        stream.readline()
+        holding.set()
+        time.sleep(linger)
+
+
+def start(target, *args):
+    """
+    Return a started daemon process running target(*args).
+    """
+    process = multiprocessing.Process(target=target, args=args,
+                                      daemon=True)
+    process.start()
+    return process
+
+
+class DistributedUnitTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SolvedCache(os.path.join(self.directory.name,
+                                              'solved.db'))
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_workers_solve_stonehenge(self):
+        """
+        Test that several workers solve a length-2 position the way
+        minimax does, and that the solved positions reach the cache with
+        their exact scores.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F'])
+        coordinator = Coordinator(game, split_depth=3)
+        self.assertGreater(len(coordinator.tasks), 3)
+        workers = [start(run_worker, *coordinator.address)
+                   for _ in range(3)]
+        score, move = coordinator.solve(self.cache, timeout=120)
+        for worker in workers:
+            worker.join(10)
+        scores = {}
+        self.assertEqual(score, exact_score(game, game.current_state,
+                                            scores))
+        self.assertEqual(exact_score(game, game.current_state, scores,
+                                     move), score)
+        self.assertEqual(self.cache.get(game.current_state.key()),
+                         (score, move))
+        self.assertGreater(len(self.cache), len(coordinator.tasks))
+        for key, expected in scores.items():
+            if self.cache.get(key) is not None:
+                self.assertEqual(self.cache.get(key)[0], expected)
+
+    def test_lost_tasks_reassigned(self):
+        """
+        Test that tasks held by a worker that stops answering, or that
+        disconnects, go to another worker and the solve still finishes
+        with minimax's exact score.
+        """
+        game = make_game(SubtractSquareGame, '30')
+        coordinator = Coordinator(game, split_depth=2, lease=0.5)
+        coordinator.start()
+        address = coordinator.address
+        holding = [multiprocessing.Event(), multiprocessing.Event()]
+        silent = start(vanishing_worker, *address, 5.0, holding[0])
+        gone = start(vanishing_worker, *address, 0.0, holding[1])
+        self.assertTrue(holding[0].wait(10) and holding[1].wait(10))
+        gone.join(10)
+        worker = start(run_worker, *address)
+        self.assertTrue(coordinator.wait(120))
+        coordinator.close()
+        worker.join(10)
+        silent.terminate()
+        self.assertGreaterEqual(coordinator.reassigned, 2)
+        self.assertEqual(coordinator.result(self.cache)[0],
+                         recursive_helper(game))
+
+    def test_unknown_task_ids_ignored(self):
+        """
+        Test that results for task ids the coordinator never handed out
+        neither finish the solve early nor change its score.
+        """
+        game = make_game(SubtractSquareGame, '30')
+        coordinator = Coordinator(game, split_depth=2)
+        coordinator.start()
+        count = len(coordinator.tasks)
+        with socket.create_connection(coordinator.address) as connection:
+            stream = connection.makefile('rwb')
+            for task in list(range(count, 2 * count)) + [-1, '0', [0]]:
+                stream.write(json.dumps({'type': 'result', 'id': task,
+                                         'score': 1, 'move': 1}).encode()
+                             + b'\n')
+            stream.flush()
+        coordinator.record(count, 1, 1)
+        self.assertFalse(coordinator.wait(0.5))
+        worker = start(run_worker, *coordinator.address)
+        self.assertTrue(coordinator.wait(120))
+        coordinator.close()
+        worker.join(10)
+        self.assertEqual(coordinator.result(self.cache)[0],
+                         recursive_helper(game))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,7 +11,13 @@ your own curiousity!)
 #
 from strategy import recursive_minimax, iterative_minimax, interactive_strategy, \
     rough_outcome_strategy
+from pn_search import PNSearchStrategy
+from search import alphabeta_strategy
+from lazy_smp import lazy_smp_strategy
+from pondering import PonderingStrategy
+from pvs import mtdf_strategy, pvs_strategy
 from typing import Any, Callable
+from time_control import TimeControl, TimeOut
 from subtract_square_game import SubtractSquareGame
 from stonehenge import Stonehenge
 
@@ -23,10 +29,30 @@ playable_games = {'s': SubtractSquareGame,
 #
 # 'mr' should map to your recursive implementation of minimax while
 # 'mi' should map to your iterative implementation of minimax
+#
+# Strategies that keep state over a game appear as their class, so that
+# make_strategy gives each player an instance of their own.
 usable_strategies = {'i': interactive_strategy,
                      'ro': rough_outcome_strategy,
                      'mr': recursive_minimax,
-                     'mi': iterative_minimax}
+                     'mi': iterative_minimax,
+                     'pn': PNSearchStrategy,
+                     'ab': alphabeta_strategy,
+                     'smp': lazy_smp_strategy,
+                     'ponder': PonderingStrategy,
+                     'pvs': pvs_strategy,
+                     'mtdf': mtdf_strategy}
+
+
+def make_strategy(key: str) -> Callable:
+    """
+    Return a strategy for one player of a game from usable_strategies[key]:
+    the strategy itself, or a new instance if it is a class
+    """
+    strategy = usable_strategies[key]
+    if isinstance(strategy, type):
+        return strategy()
+    return strategy
 
 
 class GameInterface:
@@ -36,7 +62,8 @@ class GameInterface:
     """
 
     def __init__(self, game: Any, p1_strategy: Callable,
-                 p2_strategy: Callable[[Any], Any]) -> None:
+                 p2_strategy: Callable[[Any], Any],
+                 time_control: TimeControl = None) -> None:
         """
         Initialize this GameInterface, setting its active game to game, and
         using the strategies p1_strategy for Player 1 and p2_strategy for
@@ -48,6 +75,9 @@ class GameInterface:
         :type p1_strategy:
         :param p2_strategy: The strategy for Play 2.
         :type p2_strategy:
+        :param time_control: The players' clocks, or None for unlimited
+                             time.
+        :type time_control: TimeControl
         """
         first_player = input("Type y if player 1 is to make the first move: ")
         is_p1_turn = False
@@ -57,11 +87,29 @@ class GameInterface:
         self.game = game(is_p1_turn)
         self.p1_strategy = p1_strategy
         self.p2_strategy = p2_strategy
+        self.time_control = time_control
 
     def play(self) -> None:
         """
         Play the game.
         """
+        # Strategies that keep state between moves start the game afresh,
+        # and stop any background work once it is over
+        for strategy in (self.p1_strategy, self.p2_strategy):
+            if hasattr(strategy, 'new_game'):
+                strategy.new_game()
+        try:
+            self._play()
+        finally:
+            for strategy in (self.p1_strategy, self.p2_strategy):
+                if hasattr(strategy, 'end_game'):
+                    strategy.end_game()
+
+    def _play(self) -> None:
+        """
+        Play the game from its current state until it is over or a player
+        runs out of time.
+        """
         current_state = self.game.current_state
 
         print(self.game.get_instructions())
@@ -82,7 +130,16 @@ class GameInterface:
                 current_strategy = self.p2_strategy
                 if current_state.get_current_player_name() == 'p1':
                     current_strategy = self.p1_strategy
-                move_to_make = current_strategy(self.game)
+                if self.time_control is None:
+                    move_to_make = current_strategy(self.game)
+                    continue
+                try:
+                    move_to_make = self.time_control.choose(current_strategy,
+                                                            self.game)
+                except TimeOut as out:
+                    print("{} ran out of time.".format(out.args[0]))
+                    self._print_winner(out.args[0])
+                    return
 
             # Apply the move
             current_player_name = current_state.get_current_player_name()
@@ -93,11 +150,22 @@ class GameInterface:
             print("{} made the move {}. The game's state is now:".format(
                 current_player_name, move_to_make))
             print(current_state)
+            if self.time_control is not None:
+                print("Time left: p1 {:.1f}s, p2 {:.1f}s".format(
+                    self.time_control.remaining['p1'],
+                    self.time_control.remaining['p2']))
+
+        self._print_winner()
 
-        # Print out the winner of the game
-        if self.game.is_winner("p1"):
+    def _print_winner(self, timed_out: str = None) -> None:
+        """
+        Print out the winner of the game, which is over or has been lost
+        on time by the player timed_out.
+        """
+        if timed_out == 'p2' or (timed_out is None
+                                 and self.game.is_winner("p1")):
             print("Player 1 is the winner!")
-        elif self.game.is_winner("p2"):
+        elif timed_out == 'p1' or self.game.is_winner("p2"):
             print("Player 2 is the winner!")
         else:
             print("It's a tie!")
@@ -108,8 +176,9 @@ if __name__ == '__main__':
                        playable_games[key] is not None else
                        "'{}': None".format(key) for key in playable_games])
 
-    strategies = ", ".join(["'{}': {}".format(key,
-                                              usable_strategies[key].__name__)
+    strategies = ", ".join(["'{}': {}".format(
+        key, getattr(usable_strategies[key], '__name__',
+                     type(usable_strategies[key]).__name__))
                             if usable_strategies[key] is not None else
                             "'{}': None".format(key)
                             for key in usable_strategies])
@@ -128,5 +197,11 @@ if __name__ == '__main__':
     while p2 not in usable_strategies.keys():
         p2 = input("Select the strategy for Player 2 ({}): ".format(strategies))
 
-    GameInterface(playable_games[chosen_game], usable_strategies[p1],
-                  usable_strategies[p2]).play()
+    seconds = input("Seconds on each player's clock (blank for no clock): ")
+    clock = None
+    if seconds.strip():
+        increment = input("Seconds added per move (blank for none): ")
+        clock = TimeControl(float(seconds), float(increment or 0))
+
+    GameInterface(playable_games[chosen_game], make_strategy(p1),
+                  make_strategy(p2), clock).play()
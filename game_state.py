@@ -68,6 +68,22 @@ class GameState:
         """
         raise NotImplementedError
 
+    def search_moves(self) -> list:
+        """
+        Return the moves a search needs to try from this state: by default
+        all of them, but subclasses may leave out moves that lead to
+        positions equivalent to another move's
+        """
+        return self.get_possible_moves()
+
+    def key(self) -> Any:
+        """
+        Return a hashable key that is equal for two states exactly when
+        their __repr__s are, for use in transposition tables and caches.
+        Subclasses may override this with something cheaper to build.
+        """
+        return repr(self)
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
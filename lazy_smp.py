@@ -0,0 +1,173 @@
+"""
+Lazy SMP: a parallel search mode for a single hard position.
+
+Every worker process searches the same root with iterative deepening and
+shares one SharedTranspositionTable with the others. Workers differ only
+in their move order (shuffled ties) and in the depths they start from, so
+they spread over different parts of the tree and feed each other's
+searches through the table. The first worker to finish the deepest
+iteration (or to prove the result) decides the move.
+"""
+from typing import Any
+import multiprocessing
+import os
+import queue
+import random
+import time
+from move_ordering import MoveOrderer
+from search import AlphaBeta, is_proven
+from strategy import rough_outcome_strategy
+from transposition import SharedTranspositionTable
+
+# The seconds between checks of a strategy's stop event
+_POLL = 0.05
+
+
+class _ShuffledOrderer(MoveOrderer):
+    """
+    A MoveOrderer that breaks ties in a random order of its own.
+    """
+
+    def __init__(self, seed: int) -> None:
+        """
+        Initialize an orderer whose ties are shuffled by seed
+        """
+        super().__init__()
+        self._random = random.Random(seed)
+
+    def order(self, state: Any, moves: list = None, ply: int = 0) -> list:
+        """
+        Return moves ordered as MoveOrderer would, ties shuffled
+        """
+        if moves is None:
+            moves = state.search_moves()
+        moves = moves[:]
+        self._random.shuffle(moves)
+        return super().order(state, moves, ply)
+
+
+def _worker(game: Any, table: SharedTranspositionTable, worker: int,
+            max_depth: int, results: Any, stop: Any) -> None:
+    """
+    Search game's current state with iterative deepening, putting
+    (worker, depth, value, move, nodes) on results after each iteration
+    """
+    if worker == 0:
+        engine = AlphaBeta(game, table, MoveOrderer(), stop)
+    else:
+        engine = AlphaBeta(game, table, _ShuffledOrderer(worker), stop)
+    start = 1 + worker % 2
+    for depth, value, move in engine.iterate(game.current_state, max_depth,
+                                             start):
+        results.put((worker, depth, value, move, engine.nodes))
+    results.put((worker, None, None, None, engine.nodes))
+
+
+class LazySMPStrategy:
+    """
+    A strategy that runs a Lazy SMP search on every move.
+
+    workers: the number of search processes
+    max_depth: the deepest iteration searched, or None to keep deepening
+               until the result is exact
+    time_limit: seconds after which the deepest finished iteration is
+                used, or None for no limit
+    table_size: the number of entries in the shared table
+    last_stats: for the last move chosen: the depth and value it was
+                found at, the worker that found it, the total nodes and
+                the seconds taken
+    """
+    workers: int
+    max_depth: Any
+    time_limit: Any
+    table_size: int
+    last_stats: dict
+
+    def __init__(self, workers: int = None, max_depth: int = None,
+                 time_limit: float = 10.0, table_size: int = 1 << 20) \
+            -> None:
+        """
+        Initialize a Lazy SMP strategy, using every core by default
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.table_size = table_size
+        self.last_stats = {}
+
+    def __call__(self, game: Any, time_budget: float = None,
+                 stop: Any = None) -> Any:
+        """
+        Return the best move for game that the workers agree on within
+        time_limit, or within time_budget seconds if that is sooner, or
+        before stop, if given, is set
+        """
+        max_depth = self.max_depth
+        time_limit = self.time_limit
+        if time_budget is not None:
+            time_limit = time_budget if time_limit is None \
+                else min(time_limit, time_budget)
+        table = SharedTranspositionTable(self.table_size)
+        results = multiprocessing.Queue()
+        halt = multiprocessing.Event()
+        processes = [multiprocessing.Process(
+            target=_worker, args=(game, table, w, max_depth, results, halt),
+            daemon=True) for w in range(self.workers)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        best = (0, None, None, None)
+        nodes = {}
+        running = self.workers
+        try:
+            while running and not (stop is not None and stop.is_set()):
+                timeout = None
+                if time_limit is not None:
+                    timeout = max(0.0, started + time_limit
+                                  - time.perf_counter())
+                if stop is not None:
+                    # wake up now and then to check stop
+                    timeout = min(timeout, _POLL) if timeout is not None \
+                        else _POLL
+                try:
+                    worker, depth, value, move, count = \
+                        results.get(timeout=timeout)
+                except queue.Empty:
+                    if time_limit is not None and time.perf_counter() \
+                            >= started + time_limit:
+                        break
+                    continue
+                nodes[worker] = count
+                if depth is None:
+                    running -= 1
+                    if best[2] is not None:
+                        break
+                elif depth > best[0] and move is not None:
+                    best = (depth, value, move, worker)
+                    if is_proven(value) or (max_depth is not None
+                                            and depth >= max_depth):
+                        break
+        finally:
+            halt.set()
+            for process in processes:
+                process.join(1)
+                if process.is_alive():
+                    process.terminate()
+            table.close()
+
+        self.last_stats = {'depth': best[0], 'value': best[1],
+                           'worker': best[3],
+                           'nodes': sum(nodes.values()),
+                           'seconds': time.perf_counter() - started}
+        if best[2] is None:
+            return rough_outcome_strategy(game)
+        return best[2]
+
+
+lazy_smp_strategy = LazySMPStrategy()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
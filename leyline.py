@@ -1,5 +1,5 @@
 """A Leyline to be used in a game of Stonehenge"""
-from typing import Union
+from typing import Any, Union
 class Leyline:
     """
     A Leyline has a value, either the number of the leyline
@@ -27,6 +27,41 @@ class Leyline:
         self.value = value
         self.letters = []
 
+    def copy(self) -> "Leyline":
+        """
+        Return a copy of self with its own list of letters (the value and
+        the letters themselves are immutable and shared)
+
+        >>> ley = Leyline(1)
+        >>> ley.letters = ['A', 'B']
+        >>> other = ley.copy()
+        >>> other.letters[0] = '1'
+        >>> ley.letters, other.letters, other.value
+        (['A', 'B'], ['1', 'B'], 1)
+        """
+        ley = Leyline.__new__(Leyline)
+        ley.value = self.value
+        ley.letters = self.letters[:]
+        return ley
+
+    def __copy__(self) -> "Leyline":
+        """
+        Return a shallow copy of self, sharing its list of letters
+        """
+        ley = Leyline.__new__(Leyline)
+        ley.value = self.value
+        ley.letters = self.letters
+        return ley
+
+    def __deepcopy__(self, memo: Any = None) -> "Leyline":
+        """
+        Return a copy of self made by copy(), for copy.deepcopy
+        """
+        ley = self.copy()
+        if memo is not None:
+            memo[id(self)] = ley
+        return ley
+
 
 if __name__ == "__main__":
     from python_ta import check_all
@@ -0,0 +1,255 @@
+"""
+A linear evaluation of Stonehenge positions trained offline.
+
+Training plays games against itself, labels the positions it reaches with
+the share of random playouts (or the exact search result) the player to
+move wins, and fits a logistic model over leyline-control features with
+NumPy. The weights go to a small JSON file that LinearEvaluator loads;
+its evaluate() can replace rough_outcome() as the leaf score of a
+depth-limited search, and linear_evaluation() does so with the shipped
+weights:
+
+    AlphaBeta(game, evaluate=LinearEvaluator.load(path).evaluate)
+    PVSStrategy(time_limit=5.0, evaluate=linear_evaluation)
+
+benchmark.py compares the two evaluations at fixed search depths.
+
+Run `python linear_eval.py [board length] [games] [weights file]` to
+train and save a set of weights.
+"""
+from typing import Any, List, Tuple
+import json
+import os
+import random
+import sys
+import numpy as np
+from search import AlphaBeta
+from stonehenge import Stonehenge
+from stonehenge_state import StonehengeState
+from stonehenge_vector import leyline_features, line_owners, \
+    ownership_vector, random_playouts
+from strategy import rough_outcome_strategy
+from transposition import TranspositionTable
+
+FEATURES = ['claimed', 'margin', 'needed', 'contested', 'first']
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'linear_eval_weights.json')
+
+
+def feature_matrix(states: List[StonehengeState]) -> np.ndarray:
+    """
+    Return a row of FEATURES for each of states, from the point of view
+    of the player to move: the difference between the players' captured
+    leylines and margins (over the threshold) and in the cells they still
+    need (over the number of cells), the share of open leylines both can
+    still take, and 1 if the player to move is p1 or -1 if p2 (so that a
+    weight on it is an edge for p1, whichever side is to move)
+    """
+    rows = np.zeros((len(states), len(FEATURES)))
+    groups = {}
+    for i, state in enumerate(states):
+        groups.setdefault(state.topology, []).append(i)
+    for topology, indices in groups.items():
+        batch = [states[i] for i in indices]
+        features = leyline_features(
+            topology, np.stack([ownership_vector(s) for s in batch]),
+            np.stack([line_owners(s) for s in batch]))
+        sign = np.array([1 if s.p1_turn else -1 for s in batch])
+        threshold = topology.threshold
+        rows[indices, 0] = sign * (features['claimed'][:, 0]
+                                   - features['claimed'][:, 1]) / threshold
+        rows[indices, 1] = sign * (features['margin'][:, 0]
+                                   - features['margin'][:, 1]) / threshold
+        rows[indices, 2] = sign * (features['needed'][:, 1]
+                                   - features['needed'][:, 0]) \
+            / (len(topology.cells) + 1)
+        rows[indices, 3] = features['contested'][:, 0] / len(topology.lines)
+        rows[indices, 4] = sign
+    return rows
+
+
+def self_play(length: int, games: int, seed: int = None) \
+        -> List[Tuple[Stonehenge, StonehengeState]]:
+    """
+    Return (game, state) for every unfinished position of games games on
+    a board of length length, in which each move is rough_outcome_strategy's
+    or, half the time, a random one
+    """
+    rng = random.Random(seed)
+    positions = []
+    for i in range(games):
+        game = Stonehenge.from_length(length, i % 2 == 0)
+        while not game.is_over(game.current_state):
+            positions.append((game, game.current_state))
+            if rng.random() < 0.5:
+                move = rng.choice(game.current_state.get_possible_moves())
+            else:
+                move = rough_outcome_strategy(game)
+            game.current_state = game.current_state.make_move(move)
+    return positions
+
+
+def label_playouts(states: List[StonehengeState], playouts: int = 256,
+                   seed: int = None) -> np.ndarray:
+    """
+    Return the share of playouts random games from each of states won by
+    the player to move there
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.zeros(len(states))
+    for i, state in enumerate(states):
+        winners, _ = random_playouts(state, playouts,
+                                     int(rng.integers(1 << 31)))
+        labels[i] = np.mean(winners == (1 if state.p1_turn else 2))
+    return labels
+
+
+def label_search(positions: List[Tuple[Any, StonehengeState]]) \
+        -> np.ndarray:
+    """
+    Return 1 for each position the player to move wins with best play and
+    0 for the others, searching every one to the end (small boards only)
+    """
+    tables = {}
+    labels = np.zeros(len(positions))
+    for i, (game, state) in enumerate(positions):
+        table = tables.setdefault(state.topology, TranspositionTable())
+        for _, value, _ in AlphaBeta(game, table).iterate(state):
+            pass
+        labels[i] = value > 0
+    return labels
+
+
+def fit(features: np.ndarray, labels: np.ndarray, l2: float = 1e-3,
+        iterations: int = 25) -> np.ndarray:
+    """
+    Return the weights of the logistic model that best predicts labels (in
+    [0, 1]) from the rows of features, found by Newton's method with an l2
+    penalty of l2 on the weights
+
+    >>> x = np.array([[-1.0, 1.0], [1.0, 1.0], [2.0, 1.0], [-2.0, 1.0]])
+    >>> w = fit(x, np.array([0.25, 0.75, 0.9, 0.1]))
+    >>> bool(w[0] > 0), bool(abs(w[1]) < 1e-6)
+    (True, True)
+    """
+    weights = np.zeros(features.shape[1])
+    penalty = l2 * len(labels) * np.eye(features.shape[1])
+    for _ in range(iterations):
+        predicted = 1 / (1 + np.exp(-features @ weights))
+        gradient = features.T @ (predicted - labels) + penalty @ weights
+        hessian = (features.T * (predicted * (1 - predicted))) @ features \
+            + penalty
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    return weights
+
+
+class LinearEvaluator:
+    """
+    A logistic evaluation of Stonehenge positions over FEATURES.
+
+    weights: one weight per feature
+    """
+    weights: np.ndarray
+
+    def __init__(self, weights: Any) -> None:
+        """
+        Initialize an evaluator with weights, in FEATURES order
+        """
+        self.weights = np.asarray(weights, dtype=float)
+
+    def evaluate_batch(self, states: List[StonehengeState]) -> np.ndarray:
+        """
+        Return a score in [-1, 1] for each of states for the player to
+        move there: twice the predicted chance they win, less one.
+        Finished games score -1.
+        """
+        scores = 2 / (1 + np.exp(-feature_matrix(states) @ self.weights)) - 1
+        over = [max(s.p1_score, s.p2_score) >= s.topology.threshold
+                for s in states]
+        return np.where(over, -1.0, scores)
+
+    def evaluate(self, state: StonehengeState) -> float:
+        """
+        Return a score in [-1, 1] for state for the player to move: 1 or
+        -1 where rough_outcome() sees a win or loss coming, otherwise
+        evaluate_batch for state alone
+        """
+        score = state.rough_outcome()
+        if score in (state.WIN, state.LOSE):
+            return score
+        return float(self.evaluate_batch([state])[0])
+
+    def save(self, path: str) -> None:
+        """
+        Write the weights to the JSON file at path
+        """
+        with open(path, 'w') as f:
+            json.dump({'features': FEATURES,
+                       'weights': self.weights.tolist()}, f, indent=1)
+
+    @staticmethod
+    def load(path: str = WEIGHTS_FILE) -> 'LinearEvaluator':
+        """
+        Return the evaluator saved at path (the shipped weights by
+        default)
+        """
+        with open(path) as f:
+            saved = json.load(f)
+        if saved['features'] != FEATURES:
+            raise ValueError('{} holds weights for features {}, not {}'
+                             .format(path, saved['features'], FEATURES))
+        return LinearEvaluator(saved['weights'])
+
+
+def train(length: int, games: int, label: str = 'playouts',
+          seed: int = None) -> LinearEvaluator:
+    """
+    Return an evaluator fitted to the positions of games self-play games
+    on a board of length length, labelled by 'playouts' or 'search'
+    """
+    positions = self_play(length, games, seed)
+    states = [state for _, state in positions]
+    if label == 'playouts':
+        labels = label_playouts(states, seed=seed)
+    elif label == 'search':
+        labels = label_search(positions)
+    else:
+        raise ValueError("label must be 'playouts' or 'search'")
+    return LinearEvaluator(fit(feature_matrix(states), labels))
+
+
+_DEFAULT = []
+
+
+def linear_evaluation(state: StonehengeState) -> float:
+    """
+    Return the score of state in [-1, 1] for the player to move by the
+    shipped weights, loading them the first time; states of other games
+    than Stonehenge get their rough_outcome()
+    """
+    if not isinstance(state, StonehengeState):
+        return state.rough_outcome()
+    if not _DEFAULT:
+        _DEFAULT.append(LinearEvaluator.load())
+    return _DEFAULT[0].evaluate(state)
+
+
+def main(args: List[str]) -> None:
+    """
+    Train on the board length, number of games and weights file in args
+    and save the weights
+    """
+    length = int(args[0]) if args else 3
+    games = int(args[1]) if len(args) > 1 else 200
+    path = args[2] if len(args) > 2 else WEIGHTS_FILE
+    evaluator = train(length, games, seed=0)
+    evaluator.save(path)
+    print('Saved {} to {}'.format(
+        dict(zip(FEATURES, evaluator.weights.round(3).tolist())), path))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
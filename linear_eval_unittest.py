@@ -0,0 +1,89 @@
+"""
+Unittests for the trained linear evaluation in linear_eval.py.
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from linear_eval import FEATURES, LinearEvaluator, feature_matrix, fit, \
+    label_playouts, linear_evaluation, self_play
+from pvs import PVSStrategy
+from search import AlphaBeta, WIN
+from stonehenge_state_unittest import random_positions
+from strategy_unittest import StonehengeGame, SubtractSquareGame, \
+    make_game, play
+
+
+class LinearEvalUnitTests(unittest.TestCase):
+    def test_fit_recovers_weights(self):
+        """
+        Test that fitting labels drawn from a logistic model gives back
+        roughly that model's weights.
+        """
+        rng = np.random.default_rng(0)
+        features = np.hstack([rng.normal(size=(4000, 2)),
+                              np.ones((4000, 1))])
+        weights = np.array([1.5, -2.0, 0.5])
+        chances = 1 / (1 + np.exp(-features @ weights))
+        labels = (rng.random(4000) < chances).astype(float)
+        np.testing.assert_allclose(fit(features, labels, l2=0), weights,
+                                   atol=0.2)
+
+    def test_features_follow_player_to_move(self):
+        """
+        Test that the features are the same position seen from the other
+        side when only the player to move changes: every one flips sign
+        but the contested leylines, which both players share.
+        """
+        flips = np.array([f != 'contested' for f in FEATURES])
+        for _, state in random_positions(100, seed=8):
+            other = state.copy()
+            other.p1_turn = not state.p1_turn
+            rows = feature_matrix([state, other])
+            np.testing.assert_allclose(rows[0, flips], -rows[1, flips])
+            np.testing.assert_allclose(rows[0, ~flips], rows[1, ~flips])
+
+    def test_save_load_round_trip(self):
+        """
+        Test that saved weights load back unchanged and score positions in
+        [-1, 1], finished games at -1.
+        """
+        positions = self_play(2, 10, seed=1)
+        states = [state for _, state in positions]
+        labels = label_playouts(states, playouts=64, seed=1)
+        self.assertTrue(((labels >= 0) & (labels <= 1)).all())
+        evaluator = LinearEvaluator(fit(feature_matrix(states), labels))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.json')
+            evaluator.save(path)
+            loaded = LinearEvaluator.load(path)
+        self.assertEqual(loaded.weights.tolist(), evaluator.weights.tolist())
+        self.assertEqual(len(loaded.weights), len(FEATURES))
+        for game, state in random_positions(100, seed=9):
+            score = loaded.evaluate(state)
+            self.assertTrue(-1 <= score <= 1)
+            if game.is_over(state):
+                self.assertEqual(score, -1)
+
+    def test_search_with_shipped_weights(self):
+        """
+        Test that alpha-beta and the PVS strategy scoring their leaves
+        with the shipped weights still find the only winning move, and
+        that other games fall back on rough_outcome().
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F', 'D'])
+        engine = AlphaBeta(game, evaluate=LinearEvaluator.load().evaluate)
+        depth, value, move = list(engine.iterate(game.current_state))[-1]
+        self.assertEqual((value, move), (WIN - depth, 'E'))
+        strategy = PVSStrategy(evaluate=linear_evaluation)
+        self.assertEqual(strategy(game), 'E')
+        self.assertEqual(strategy.last_stats['value'], value)
+
+        state = make_game(SubtractSquareGame, '10').current_state
+        self.assertEqual(linear_evaluation(state), state.rough_outcome())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Move ordering for pruning searches.
+
+Moves are ranked by their static effect on the leylines first (winning,
+capturing, blocking an opponent capture), then by killer moves and a
+history table that a search refines as it finds cutoffs, and finally by
+how contested the leylines through them are.
+"""
+from typing import Any, Dict, List
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a state for a search, best candidates first.
+    Works on any GameState; the static leyline ranking only applies to
+    states that can report capture counts (StonehengeState), other games
+    are ordered by killers and history alone.
+
+    killers: the last two moves that caused a cutoff at each ply
+    history: cutoff credit accumulated by each (player, move)
+    """
+    killers: Dict[int, List[Any]]
+    history: Dict[Any, int]
+
+    def __init__(self) -> None:
+        """
+        Initialize a MoveOrderer with empty killer and history tables
+        """
+        self.killers = {}
+        self.history = {}
+
+    def order(self, state: Any, moves: List[Any] = None,
+              ply: int = 0) -> List[Any]:
+        """
+        Return moves (state's search_moves() by default) ordered for a
+        search at depth ply below the root, best first. Ties keep their
+        original order.
+        """
+        if moves is None:
+            moves = state.search_moves()
+        tactics = static_scores(state, moves)
+        killers = self.killers.get(ply, [])
+        player = state.p1_turn
+
+        def key(move: Any) -> tuple:
+            win, capture, block, contest = tactics.get(move, (0, 0, 0, 0))
+            return (win, capture, block, move in killers,
+                    self.history.get((player, move), 0), contest)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def record_cutoff(self, state: Any, move: Any, ply: int,
+                      depth: int) -> None:
+        """
+        Record that move caused a cutoff in state at depth ply below the
+        root with depth plies left to search
+        """
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (state.p1_turn, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def clear(self) -> None:
+        """
+        Forget every killer move and all history
+        """
+        self.killers.clear()
+        self.history.clear()
+
+
+def static_scores(state: Any, moves: List[Any]) -> Dict[Any, tuple]:
+    """
+    Return (wins, captures, blocks, contest) for each of moves in state:
+    whether the move wins outright, how many leylines it captures for the
+    player to move, how many it denies the opponent, and the total number
+    of claims on the open leylines through it that both players hold
+    cells on. States without capture counts get no static scores.
+    """
+    if not hasattr(state, 'capture_counts'):
+        return {}
+    if state.p1_turn:
+        me, other = 'p1', 'p2'
+        mine, theirs = state.p1_claims, state.p2_claims
+    else:
+        me, other = 'p2', 'p1'
+        mine, theirs = state.p2_claims, state.p1_claims
+    captures = state.capture_counts(me)
+    blocks = state.capture_counts(other)
+    wins = set(state.winning_moves(me))
+    lines = state.h_lines + state.r_lines + state.l_lines
+    topology = state.topology
+
+    scores = {}
+    for move in moves:
+        contest = 0
+        for k, _ in topology.cell_lines[topology.index[move]]:
+            if type(lines[k].value) == int and mine[k] and theirs[k]:
+                contest += mine[k] + theirs[k]
+        scores[move] = (move in wins, captures.get(move, 0),
+                        blocks.get(move, 0), contest)
+    return scores
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
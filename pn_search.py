@@ -0,0 +1,350 @@
+"""
+Proof-number search for deciding game positions.
+
+The search grows a proof tree best-first, always expanding the leaf that
+is cheapest to prove or disprove, until the root is decided or the tree
+reaches its size limit. Solved positions are kept in a transposition table
+keyed by GameState.key(), so a position reached again through another move
+order is not searched twice, and solved subtrees are freed as soon as
+they are decided. The table is capped too: once full, the positions solved
+longest ago are dropped first.
+
+A ProofNumberSearch keeps its tree between searches. When it is asked to
+solve a position two plies below the last root (after the move it found
+and the opponent's reply), it carries on from that part of the old tree,
+with its proof numbers, and drops the rest. The part carried over counts
+towards the next search's tree size.
+"""
+from typing import Any, Dict, List
+from move_ordering import MoveOrderer
+from strategy import decided_score, rough_outcome_strategy, state_score
+
+INFINITY = float('inf')
+
+
+class PNNode:
+    """
+    A node of a proof-number search tree. The search tries to prove that
+    the player to move at the root wins; OR nodes are those where that
+    player is to move, AND nodes those where the opponent is.
+
+    state: the GameState at this node
+    move: the move that led here from parent
+    parent: the node above this one, or None at the root
+    is_or: whether the root player is to move
+    proof: the proof number (cells to prove a win)
+    disproof: the disproof number (cells to disprove it)
+    children: the expanded children, or None while this is a leaf
+    """
+    state: Any
+    move: Any
+    parent: 'PNNode'
+    is_or: bool
+    proof: float
+    disproof: float
+    children: List['PNNode']
+
+    def __init__(self, state: Any, move: Any, parent: 'PNNode',
+                 is_or: bool) -> None:
+        """
+        Initialize a leaf for state, reached from parent by move
+        """
+        self.state = state
+        self.move = move
+        self.parent = parent
+        self.is_or = is_or
+        self.proof = 1
+        self.disproof = 1
+        self.children = None
+
+    def update(self) -> None:
+        """
+        Recompute this node's numbers from its children
+        """
+        if self.is_or:
+            self.proof = min(c.proof for c in self.children)
+            self.disproof = sum(c.disproof for c in self.children)
+        else:
+            self.proof = sum(c.proof for c in self.children)
+            self.disproof = min(c.disproof for c in self.children)
+
+
+class PNResult:
+    """
+    The outcome of a proof-number search.
+
+    value: WIN (1) if the player to move is proven to win, LOSE (-1) if
+           they are proven unable to force a win (a loss in games without
+           draws, like Stonehenge), or None if the budget ran out first
+    move: a winning move when value is WIN, otherwise None
+    nodes: the size of the search's tree: the nodes carried over from the
+           last search and those it created
+    """
+    value: Any
+    move: Any
+    nodes: int
+
+    def __init__(self, value: Any, move: Any, nodes: int) -> None:
+        """
+        Initialize a PNResult
+        """
+        self.value = value
+        self.move = move
+        self.nodes = nodes
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of self
+        """
+        return 'PNResult({}, {}, {})'.format(self.value, self.move,
+                                             self.nodes)
+
+
+class ProofNumberSearch:
+    """
+    A proof-number search over the states of a game.
+
+    game: the game whose states are searched (for its is_over and
+          is_winner)
+    max_nodes: the most nodes a search's tree may hold, counting those
+               carried over from the search before
+    max_table: the most solved positions kept in table
+    table: solved positions, mapping key() to (wins, move): whether the
+           player to move there wins, and a winning move if they do,
+           oldest first
+    reused: whether the last search started from part of the tree left
+            by the one before
+
+    The search assumes the game has no draws, as in Stonehenge and
+    SubtractSquare; a drawn position counts as lost for the player to
+    move.
+    """
+    game: Any
+    max_nodes: int
+    max_table: int
+    table: Dict[Any, tuple]
+    reused: bool
+
+    def __init__(self, game: Any, max_nodes: int = 100000,
+                 max_table: int = 1000000) -> None:
+        """
+        Initialize a search over game's states whose trees hold at most
+        max_nodes nodes and whose transposition table, empty for now,
+        holds at most max_table positions
+        """
+        self.game = game
+        self.max_nodes = max_nodes
+        self.max_table = max_table
+        self.table = {}
+        self.reused = False
+        self._orderer = MoveOrderer()
+        self._nodes = 0
+        self._root = None
+
+    def solve(self, state: Any, stop: Any = None) -> PNResult:
+        """
+        Return whether the player to move at state can force a win,
+        together with a winning move; the result is unknown if stop is
+        given and set before the search finishes
+        """
+        root = self._reroot(state)
+        if root is not None:
+            self._nodes = self._size(root)
+            if self._nodes >= self.max_nodes:
+                root = None
+        self.reused = root is not None
+        if root is None:
+            self._nodes = 1
+            root = PNNode(state, None, None, True)
+            self._evaluate(root)
+        self._root = root
+
+        while root.proof and root.disproof and self._nodes < self.max_nodes \
+                and not (stop is not None and stop.is_set()):
+            node = root
+            while node.children is not None:
+                node = self._most_proving_child(node)
+            self._expand(node)
+            self._update_ancestors(node)
+
+        if root.proof == 0:
+            return PNResult(state.WIN, self.table[state.key()][1],
+                            self._nodes)
+        if root.disproof == 0:
+            return PNResult(state.LOSE, None, self._nodes)
+        return PNResult(None, None, self._nodes)
+
+    def _reroot(self, state: Any) -> Any:
+        """
+        Return the node for state in the last search's tree, at its root
+        or two plies below it, detached from the rest; or None if there is
+        none
+        """
+        if self._root is None:
+            return None
+        key = state.key()
+        if self._root.state.key() == key:
+            return self._root
+        for child in self._root.children or []:
+            for grandchild in child.children or []:
+                if grandchild.state.key() == key:
+                    grandchild.parent, grandchild.move = None, None
+                    return grandchild
+        return None
+
+    @staticmethod
+    def _size(node: PNNode) -> int:
+        """
+        Return the number of nodes in the tree below and including node
+        """
+        size, stack = 0, [node]
+        while stack:
+            node = stack.pop()
+            size += 1
+            stack.extend(node.children or [])
+        return size
+
+    @staticmethod
+    def _most_proving_child(node: PNNode) -> PNNode:
+        """
+        Return the child of node that determines its proof number (at
+        an OR node) or disproof number (at an AND node)
+        """
+        if node.is_or:
+            return min(node.children, key=lambda c: c.proof)
+        return min(node.children, key=lambda c: c.disproof)
+
+    def _evaluate(self, node: PNNode) -> None:
+        """
+        Set the numbers of a new leaf, deciding it outright if it is over,
+        already solved, decided (below the root) or has a winning move for
+        the player to move
+        """
+        key = node.state.key()
+        if key in self.table:
+            wins, move = self.table[key]
+        elif state_score(self.game, node.state) is not None:
+            wins, move = False, None
+        elif node.parent is not None \
+                and decided_score(node.state) is not None:
+            # any move keeps a decided position decided
+            wins = decided_score(node.state) > 0
+            move = None
+            if wins:
+                move = self._immediate_win(node.state) \
+                    or node.state.search_moves()[0]
+        else:
+            move = self._immediate_win(node.state)
+            wins = move is not None
+            if not wins:
+                moves = len(node.state.search_moves())
+                if node.is_or:
+                    node.proof, node.disproof = 1, moves
+                else:
+                    node.proof, node.disproof = moves, 1
+                return
+        self._set_solved(node, wins, move)
+
+    def _set_solved(self, node: PNNode, wins: bool, move: Any) -> None:
+        """
+        Mark node solved, where wins says whether the player to move at
+        node wins, and record it in the table along with the winning move
+        """
+        self.table[node.state.key()] = (wins, move)
+        if len(self.table) > self.max_table:
+            del self.table[next(iter(self.table))]
+        if wins == node.is_or:
+            node.proof, node.disproof = 0, INFINITY
+        else:
+            node.proof, node.disproof = INFINITY, 0
+
+    @staticmethod
+    def _immediate_win(state: Any) -> Any:
+        """
+        Return a move that wins at once for the player to move at state,
+        or None if there is none or state cannot tell
+        """
+        if hasattr(state, 'winning_moves'):
+            wins = state.winning_moves(state.get_current_player_name())
+            if wins:
+                return wins[0]
+        return None
+
+    def _expand(self, node: PNNode) -> None:
+        """
+        Create and evaluate the children of the leaf node
+        """
+        node.children = []
+        for move in self._orderer.order(node.state):
+            child = PNNode(node.state.make_move(move), move, node,
+                           not node.is_or)
+            self._evaluate(child)
+            node.children.append(child)
+            self._nodes += 1
+            if (child.proof if node.is_or else child.disproof) == 0:
+                break
+
+    def _update_ancestors(self, node: PNNode) -> None:
+        """
+        Recompute the numbers from node up to the root, recording and
+        freeing every subtree that becomes solved
+        """
+        while node is not None:
+            node.update()
+            if node.proof == 0 or node.disproof == 0:
+                wins = (node.proof == 0) == node.is_or
+                move = None
+                if wins:
+                    move = next(c.move for c in node.children
+                                if (c.proof if node.is_or
+                                    else c.disproof) == 0)
+                self._set_solved(node, wins, move)
+                if node.parent is not None:
+                    node.children = []
+            node = node.parent
+
+
+class PNSearchStrategy:
+    """
+    A strategy that plays moves proof-number search proves winning, or
+    rough_outcome_strategy's move when it finds none within its budget.
+    One search, with its tree and table, is kept for a whole game, taken
+    up again two plies on at each of the player's moves, so each player
+    needs an instance of their own.
+
+    max_nodes: the most nodes each move's search tree may hold
+    search: the ProofNumberSearch of the current game, or None before the
+            first move
+    """
+    max_nodes: int
+    search: Any
+
+    def __init__(self, max_nodes: int = 100000) -> None:
+        """
+        Initialize a strategy searching max_nodes nodes per move
+        """
+        self.max_nodes = max_nodes
+        self.search = None
+
+    def __call__(self, game: Any, stop: Any = None) -> Any:
+        """
+        Return a move for game, searching until stop, if given, is set at
+        the latest
+        """
+        if self.search is None:
+            self.search = ProofNumberSearch(game, self.max_nodes)
+        result = self.search.solve(game.current_state, stop)
+        if result.move is not None:
+            return result.move
+        return rough_outcome_strategy(game)
+
+    def new_game(self) -> None:
+        """
+        Forget everything learned in the game before
+        """
+        self.search = None
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
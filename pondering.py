@@ -0,0 +1,148 @@
+"""
+Pondering: searching on the opponent's time.
+
+After a PonderingStrategy plays its move it keeps searching the resulting
+position in a background thread, so the opponent's likely replies are
+explored (best replies first, by the usual move ordering) while the
+opponent thinks. Everything found goes into the strategy's transposition
+table. When the strategy is next asked for a move, pondering stops and the
+search starts from the position actually reached, finding whatever the
+ponder search already learned about it in the table.
+
+Pondering uses the CPU while the opponent is thinking, so it is meant for
+games against interactive_strategy; against another engine in the same
+process the two would compete for time. A PonderingStrategy keeps one
+game's table, so each player needs an instance of their own.
+"""
+from typing import Any
+import copy
+import threading
+import time
+from search import AlphaBeta
+from strategy import rough_outcome_strategy
+from transposition import TranspositionTable
+
+
+class PonderingStrategy:
+    """
+    An alpha-beta strategy that ponders on the opponent's time.
+
+    time_limit: the most seconds spent choosing a move, or None to search
+                until the result is exact
+    table: the transposition table kept across moves
+    last_stats: for the last move chosen: the depth and value it was
+                found at, the nodes searched for it, the nodes searched
+                while pondering before it, and the seconds taken
+    """
+    time_limit: Any
+    table: TranspositionTable
+    last_stats: dict
+
+    def __init__(self, time_limit: float = None) -> None:
+        """
+        Initialize a pondering strategy with an empty table
+        """
+        self.time_limit = time_limit
+        self.table = TranspositionTable()
+        self.last_stats = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._pondered = 0
+
+    def __call__(self, game: Any, time_budget: float = None,
+                 stop: Any = None) -> Any:
+        """
+        Return the best move for game, found within time_limit or
+        time_budget seconds (whichever is sooner) and before stop, if
+        given, is set, then start pondering the position it leads to
+        """
+        self.stop_pondering()
+        started = time.perf_counter()
+        limit = self.time_limit
+        if time_budget is not None:
+            limit = time_budget if limit is None else min(limit, time_budget)
+
+        timer = None
+        if limit is not None:
+            if stop is None:
+                stop = threading.Event()
+            timer = threading.Timer(limit, stop.set)
+            timer.start()
+        engine = AlphaBeta(game, self.table, stop=stop)
+        depth, value, move = 0, None, None
+        for depth, value, move in engine.iterate(game.current_state):
+            pass
+        if timer is not None:
+            timer.cancel()
+            timer.join()
+        if move is None:
+            move = rough_outcome_strategy(game)
+
+        self.last_stats = {'depth': depth, 'value': value,
+                           'nodes': engine.nodes,
+                           'pondered': self._pondered,
+                           'seconds': time.perf_counter() - started}
+        self.ponder(game, game.current_state.make_move(move))
+        return move
+
+    def ponder(self, game: Any, state: Any) -> None:
+        """
+        Start searching state in the background, until stop_pondering()
+        """
+        self.stop_pondering()
+        if game.is_over(state):
+            return
+        self._stop = threading.Event()
+        self._pondered = 0
+        game = copy.copy(game)
+        game.current_state = state
+        self._thread = threading.Thread(target=self._ponder,
+                                        args=(game, self._stop), daemon=True)
+        self._thread.start()
+
+    def _ponder(self, game: Any, stop: threading.Event) -> None:
+        """
+        Deepen a search of game's current state until it is exact or stop
+        is set
+        """
+        engine = AlphaBeta(game, self.table, stop=stop)
+        for _ in engine.iterate(game.current_state):
+            self._pondered = engine.nodes
+        self._pondered = engine.nodes
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait up to timeout seconds for the background search to finish by
+        itself, returning whether it has
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def new_game(self) -> None:
+        """
+        Stop pondering and forget everything learned in the game before
+        """
+        self.stop_pondering()
+        self.table.clear()
+
+    def end_game(self) -> None:
+        """
+        Stop pondering, the game being over
+        """
+        self.stop_pondering()
+
+    def stop_pondering(self) -> None:
+        """
+        Stop the background search, if one is running, and wait for it
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
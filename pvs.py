@@ -0,0 +1,191 @@
+"""
+Null-window searches: principal variation search and MTD(f).
+
+Principal variation search trusts the move ordering: it searches the first
+move of a node with the full window and every other move with a null
+window around alpha, which only proves the move no better. A move that
+does turn out better is searched again with the full window. MTD(f)
+narrows in on the value of the root with null-window searches alone,
+starting from the value of the last iteration; the transposition table
+keeps each search from repeating the last one's work.
+
+Both return the principal variation along with the move: the line of best
+moves that the transposition table holds after the search.
+"""
+from typing import Any, Callable, List
+import threading
+import time
+from search import WIN, AlphaBeta
+from strategy import rough_outcome_strategy
+from transposition import TranspositionTable
+
+
+class PVSearch(AlphaBeta):
+    """
+    A principal variation search: alpha-beta with null windows for every
+    move after the first.
+
+    researches: the number of moves searched again with the full window
+    """
+    researches: int
+
+    def __init__(self, game: Any, table: Any = None, orderer: Any = None,
+                 stop: Any = None, evaluate: Any = None) -> None:
+        """
+        Initialize a search over game's states
+        """
+        super().__init__(game, table, orderer, stop, evaluate)
+        self.researches = 0
+
+    def search_child(self, child: Any, depth: int, alpha: int, beta: int,
+                     ply: int, first: bool) -> int:
+        """
+        Return the value of child, searching it with a null window unless
+        it is the first move or beats alpha without reaching beta
+        """
+        if first or beta - alpha <= 1:
+            return -self.search(child, depth, -beta, -alpha, ply)
+        value = -self.search(child, depth, -alpha - 1, -alpha, ply)
+        if alpha < value < beta:
+            self.researches += 1
+            value = -self.search(child, depth, -beta, -alpha, ply)
+        return value
+
+    def principal_variation(self, state: Any, length: int = None) \
+            -> List[Any]:
+        """
+        Return the best line of play from state held in the table, at most
+        length moves long. The line stops early where the table has no
+        move: at the end of the game or a position already decided.
+        """
+        line, seen = [], set()
+        while length is None or len(line) < length:
+            if self.game.is_over(state) or state.key() in seen:
+                break
+            seen.add(state.key())
+            move = self.best_move(state)
+            if move is None:
+                break
+            line.append(move)
+            state = state.make_move(move)
+        return line
+
+
+class MTDSearch(PVSearch):
+    """
+    MTD(f): the value of the root found by null-window searches only.
+
+    passes: the number of null-window searches of the root
+    """
+    passes: int
+
+    def __init__(self, game: Any, table: Any = None, orderer: Any = None,
+                 stop: Any = None, evaluate: Any = None) -> None:
+        """
+        Initialize a search over game's states
+        """
+        super().__init__(game, table, orderer, stop, evaluate)
+        self.passes = 0
+
+    def search_root(self, state: Any, depth: int, guess: int) -> int:
+        """
+        Return the value of state searched depth plies deep, closing in on
+        it from guess with null-window searches
+        """
+        lower, upper = -WIN - 1, WIN + 1
+        value = guess
+        while lower < upper:
+            beta = value + 1 if value == lower else value
+            value = self.search(state, depth, beta - 1, beta)
+            self.passes += 1
+            if value < beta:
+                upper = value
+            else:
+                lower = value
+        return value
+
+
+class PVSStrategy:
+    """
+    A strategy that plays the move of a principal variation search, or
+    of MTD(f).
+
+    mtdf: whether to search with MTD(f) rather than PVS
+    time_limit: the most seconds spent choosing a move, or None to search
+                until the result is exact
+    evaluate: scores positions at the depth limit in [-1, 1] for the
+              player to move, or None for their rough_outcome()
+    last_pv: the principal variation found for the last move, starting
+             with the move played
+    last_stats: for the last move chosen: the depth and value it was
+                found at, the nodes searched and the seconds taken
+    """
+    mtdf: bool
+    time_limit: Any
+    evaluate: Any
+    last_pv: List[Any]
+    last_stats: dict
+
+    def __init__(self, mtdf: bool = False, time_limit: float = None,
+                 evaluate: Callable[[Any], float] = None) -> None:
+        """
+        Initialize a PVS (or MTD(f), if mtdf) strategy
+        """
+        self.mtdf = mtdf
+        self.time_limit = time_limit
+        self.evaluate = evaluate
+        self.last_pv = []
+        self.last_stats = {}
+
+    def analyse(self, game: Any, time_budget: float = None,
+                stop: Any = None) -> tuple:
+        """
+        Return (move, value, principal variation) for game, searched
+        within time_limit or time_budget seconds (whichever is sooner) and
+        until stop, if given, is set; the move is None if not even the
+        first iteration finished
+        """
+        started = time.perf_counter()
+        limit = self.time_limit
+        if time_budget is not None:
+            limit = time_budget if limit is None else min(limit, time_budget)
+        timer = None
+        if limit is not None:
+            if stop is None:
+                stop = threading.Event()
+            timer = threading.Timer(limit, stop.set)
+            timer.start()
+        engine = (MTDSearch if self.mtdf else PVSearch)(
+            game, TranspositionTable(), stop=stop, evaluate=self.evaluate)
+        depth, value, move = 0, None, None
+        for depth, value, move in engine.iterate(game.current_state):
+            pass
+        if timer is not None:
+            timer.cancel()
+
+        pv = []
+        if move is not None:
+            pv = [move] + engine.principal_variation(
+                game.current_state.make_move(move), depth - 1)
+        self.last_pv = pv
+        self.last_stats = {'depth': depth, 'value': value,
+                           'nodes': engine.nodes,
+                           'seconds': time.perf_counter() - started}
+        return move, value, pv
+
+    def __call__(self, game: Any, time_budget: float = None,
+                 stop: Any = None) -> Any:
+        """
+        Return the best move for game
+        """
+        move = self.analyse(game, time_budget, stop)[0]
+        return rough_outcome_strategy(game) if move is None else move
+
+
+pvs_strategy = PVSStrategy()
+mtdf_strategy = PVSStrategy(mtdf=True)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,258 @@
+"""
+Depth-limited alpha-beta search over the GameState interface.
+
+Scores are integers for the player to move. A finished game is worth
+WIN - ply to the winner (so quicker wins score higher) and anything within
+MATE_BOUND of WIN is a proven result; positions at the depth limit are
+scored by rough_outcome(), or another evaluation in [-1, 1], scaled to
+[-HEURISTIC, HEURISTIC].
+"""
+from typing import Any, Callable, List
+import threading
+from move_ordering import MoveOrderer
+from strategy import SearchAborted, decided_score, rough_outcome_strategy, \
+    state_score
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+WIN = 100000
+MATE_BOUND = WIN - 1000
+HEURISTIC = 1000
+
+
+def is_proven(value: int) -> bool:
+    """
+    Return whether value is a proven win or loss rather than an estimate
+
+    >>> is_proven(WIN - 3), is_proven(-WIN + 7), is_proven(HEURISTIC)
+    (True, True, False)
+    """
+    return abs(value) > MATE_BOUND
+
+
+class AlphaBeta:
+    """
+    A negamax alpha-beta search with a transposition table and move
+    ordering.
+
+    game: the game whose states are searched
+    table: a TranspositionTable or SharedTranspositionTable
+    orderer: the MoveOrderer used at every node
+    stop: an object whose is_set() aborts the search when true (a
+          threading or multiprocessing Event), or None
+    evaluate: scores positions at the depth limit in [-1, 1] for the
+              player to move (their rough_outcome() by default)
+    nodes: the number of nodes visited so far
+    estimated: whether the last search used an estimate anywhere (a
+               rough_outcome at the depth limit or an unproven table
+               value); if not, its value is exact
+    """
+    game: Any
+    table: Any
+    orderer: MoveOrderer
+    stop: Any
+    evaluate: Callable[[Any], float]
+    nodes: int
+    estimated: bool
+
+    def __init__(self, game: Any, table: Any = None,
+                 orderer: MoveOrderer = None, stop: Any = None,
+                 evaluate: Callable[[Any], float] = None) -> None:
+        """
+        Initialize a search over game's states
+        """
+        self.game = game
+        self.table = TranspositionTable() if table is None else table
+        self.orderer = MoveOrderer() if orderer is None else orderer
+        self.stop = stop
+        self.evaluate = _rough_outcome if evaluate is None else evaluate
+        self.nodes = 0
+        self.estimated = False
+
+    def search(self, state: Any, depth: int, alpha: int = -WIN - 1,
+               beta: int = WIN + 1, ply: int = 0) -> int:
+        """
+        Return the value of state for the player to move, searched depth
+        plies deep, as exact if it lies strictly between alpha and beta
+        and as a bound on the side of whichever it does not
+        """
+        self.nodes += 1
+        if self.stop is not None and self.nodes % 256 == 0 \
+                and self.stop.is_set():
+            raise SearchAborted()
+        score = state_score(self.game, state)
+        if score is not None:
+            return score * (WIN - ply)
+        # a decided position ends within the moves left, which bounds its
+        # value; the bound settles it only as a cutoff (the root is
+        # searched regardless, so that it gets a move)
+        score = decided_score(state) if ply else None
+        if score is not None:
+            low = WIN - ply - len(state.get_possible_moves())
+            high = WIN - ply - 1
+            if score < 0:
+                low, high = -high, -low
+            if low >= beta:
+                return low
+            if high <= alpha:
+                return high
+        if depth <= 0:
+            self.estimated = True
+            return round(self.evaluate(state) * HEURISTIC)
+
+        key = state.key()
+        moves = state.search_moves()
+        entry = self.table.probe(key)
+        first = None
+        if entry is not None:
+            value, bound, searched, index = entry
+            value = _from_table(value, ply)
+            if searched >= depth and (
+                    bound == EXACT or (bound == LOWER and value >= beta)
+                    or (bound == UPPER and value <= alpha)):
+                self.estimated = self.estimated or not is_proven(value)
+                return value
+            if index is not None and index < len(moves):
+                first = moves[index]
+
+        original_alpha = alpha
+        best, best_move = -WIN - 1, None
+        for i, move in enumerate(self.ordered_moves(state, moves, first,
+                                                    ply)):
+            value = self.search_child(state.make_move(move), depth - 1,
+                                      alpha, beta, ply + 1, i == 0)
+            if value > best:
+                best, best_move = value, move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.orderer.record_cutoff(state, move, ply, depth)
+                break
+
+        if best <= original_alpha:
+            bound = UPPER
+            # every move failed low, so none is known to be best: keep
+            # the table's move, if any
+            best_move = best_move if first is None else first
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, _to_table(best, ply), bound, depth,
+                         moves.index(best_move))
+        return best
+
+    def search_child(self, child: Any, depth: int, alpha: int, beta: int,
+                     ply: int, first: bool) -> int:
+        """
+        Return the value, for the player moving to it, of child searched
+        depth plies deep within the window (alpha, beta) of its parent,
+        first saying whether it is the parent's first move
+        """
+        return -self.search(child, depth, -beta, -alpha, ply)
+
+    def ordered_moves(self, state: Any, moves: List[Any], first: Any,
+                      ply: int) -> List[Any]:
+        """
+        Return moves in the order to search them, first (the table's best
+        move, if any) ahead of the rest
+        """
+        ordered = self.orderer.order(state, moves, ply)
+        if first is not None:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    def search_root(self, state: Any, depth: int, guess: int) -> int:
+        """
+        Return the exact value of state searched depth plies deep, given
+        guess, the value of the last, shallower search
+        """
+        return self.search(state, depth)
+
+    def best_move(self, state: Any) -> Any:
+        """
+        Return the best move for state stored in the table, or None
+        """
+        entry = self.table.probe(state.key())
+        if entry is None or entry[3] is None:
+            return None
+        moves = state.search_moves()
+        if entry[3] >= len(moves):
+            return None
+        return moves[entry[3]]
+
+    def iterate(self, state: Any, max_depth: int = None,
+                start: int = 1, step: int = 1) -> Any:
+        """
+        Yield (depth, value, move) for searches of state to depths start,
+        start + step, ... up to max_depth (no limit by default), stopping
+        early once the value is proven or exact, or the stop flag is set
+        """
+        depth, value = start, 0
+        while max_depth is None or depth <= max_depth:
+            self.estimated = False
+            try:
+                value = self.search_root(state, depth, value)
+            except SearchAborted:
+                return
+            yield depth, value, self.best_move(state)
+            if is_proven(value) or not self.estimated:
+                return
+            depth += step
+
+
+def _rough_outcome(state: Any) -> float:
+    """
+    Return state.rough_outcome(), the default evaluation
+    """
+    return state.rough_outcome()
+
+
+def _to_table(value: int, ply: int) -> int:
+    """
+    Return value, found ply plies below the root, as a distance from the
+    node it belongs to
+    """
+    if value > MATE_BOUND:
+        return value + ply
+    if value < -MATE_BOUND:
+        return value - ply
+    return value
+
+
+def _from_table(value: int, ply: int) -> int:
+    """
+    Return a table value as seen from ply plies below the root
+    """
+    if value > MATE_BOUND:
+        return value - ply
+    if value < -MATE_BOUND:
+        return value + ply
+    return value
+
+
+def alphabeta_strategy(game: Any, time_budget: float = None,
+                       stop: Any = None) -> Any:
+    """
+    Return the best move for game found by alpha-beta searching every
+    remaining move, or, given a time_budget in seconds or a stop event, by
+    the deepest search finished within the budget or before stop is set
+    """
+    timer = None
+    if time_budget is not None:
+        if stop is None:
+            stop = threading.Event()
+        timer = threading.Timer(time_budget, stop.set)
+        timer.start()
+    engine = AlphaBeta(game, stop=stop)
+    move = None
+    for _, _, move in engine.iterate(game.current_state):
+        pass
+    if timer is not None:
+        timer.cancel()
+    return rough_outcome_strategy(game) if move is None else move
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,64 @@
+"""
+Solving a Stonehenge position with iterative minimax from the command
+line, checkpointing as it goes.
+
+Run `python solve.py LENGTH [MOVE ...] --checkpoint FILE` to solve the
+position the moves lead to on a board of that length. Every --interval
+seconds the search's progress is saved to FILE; after a crash or a kill,
+run the same command with --resume to carry on from the last save instead
+of starting over. With --cache, solved positions are looked up in and
+written to a SolvedCache.
+"""
+from typing import List
+import argparse
+import os
+import sys
+import time
+import strategy
+from checkpoint import Checkpoint
+from solved_cache import SolvedCache
+from stonehenge import Stonehenge
+
+
+def main(args: List[str] = None) -> None:
+    """
+    Solve the position args describe
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('length', type=int)
+    parser.add_argument('moves', nargs='*')
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--interval', type=float, default=60.0)
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--cache', default=None)
+    options = parser.parse_args(args)
+    if options.resume and options.checkpoint is None:
+        parser.error('--resume needs --checkpoint')
+
+    game = Stonehenge.from_length(options.length)
+    for move in options.moves:
+        game.current_state = game.current_state.make_move(move)
+
+    checkpoint = None
+    if options.checkpoint is not None:
+        if not options.resume and os.path.exists(options.checkpoint):
+            os.remove(options.checkpoint)
+        checkpoint = Checkpoint(options.checkpoint, options.interval)
+    cache = SolvedCache(options.cache) if options.cache else None
+    strategy.use_solved_cache(cache)
+
+    started = time.perf_counter()
+    move = strategy.iterative_minimax(game, checkpoint)
+    seconds = time.perf_counter() - started
+    strategy.use_solved_cache(None)
+    if cache is not None:
+        cache.close()
+    if checkpoint is not None:
+        print('Best move {}, score {} ({:.1f} s, {} checkpoints)'.format(
+            move, checkpoint.result[0], seconds, checkpoint.saves))
+    else:
+        print('Best move {} ({:.1f} s)'.format(move, seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,108 @@
+"""
+A persistent store of solved positions shared across runs.
+
+Positions are stored in an SQLite file under their GameState.key(), with
+the score for the player to move and a best move. SQLite's write-ahead log
+lets several processes read and append to the same file at once, and the
+store keeps only the positions of its most recent writes once it grows
+past a size cap. Within a process, one store may be used from several
+threads; they take turns with its connection.
+"""
+from typing import Any, Iterable, Tuple
+import json
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solved (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    move TEXT
+)
+"""
+
+
+class SolvedCache:
+    """
+    Solved positions stored on disk.
+
+    path: the SQLite file holding the positions
+    max_entries: the most positions kept: those written by the last
+                 max_entries writes (writing a position again counts as
+                 a new write); older ones are evicted
+    """
+    path: str
+    max_entries: int
+
+    def __init__(self, path: str, max_entries: int = 1000000,
+                 timeout: float = 30.0) -> None:
+        """
+        Open (creating if needed) the store at path, waiting up to timeout
+        seconds for other processes' writes to finish
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=timeout,
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def get(self, key: str) -> Any:
+        """
+        Return (value, move) for the position with key, or None if it has
+        not been solved
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value, move FROM solved WHERE key = ?',
+                (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, value: int, move: Any) -> None:
+        """
+        Record that the player to move at the position with key scores
+        value, playing move
+        """
+        self.put_many([(key, value, move)])
+
+    def put_many(self, entries: Iterable[Tuple[str, int, Any]]) -> None:
+        """
+        Record every (key, value, move) of entries in one transaction,
+        then evict the entries written before the last max_entries writes
+        """
+        rows = [(key, value, json.dumps(move)) for key, value, move in entries]
+        if not rows:
+            return
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO solved '
+                                 'VALUES (?, ?, ?)', rows)
+            # each write takes the next rowid, so this needs no count of
+            # the whole table
+            self._db.execute('DELETE FROM solved WHERE rowid <= '
+                             '(SELECT MAX(rowid) FROM solved) - ?',
+                             (self.max_entries,))
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions stored
+        """
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM solved').fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Close the store
+        """
+        with self._lock:
+            self._db.close()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,177 @@
+"""
+Exact solving over the graph of reachable positions.
+
+Minimax walks the game tree, visiting a position once for every move order
+that reaches it. A StateGraph enumerates the positions reachable from a
+starting state once each, deduplicated by GameState.key(), and keeps the
+moves between them as compressed sparse rows: the moves out of node n are
+edges offsets[n] to offsets[n + 1] - 1, leading to targets[edge] by
+moves[edge]. solve() then settles every node by backward induction, each
+node after all the nodes its moves lead to, in time linear in the size of
+the graph rather than the number of paths through it.
+
+Values follow strategy.py: WIN_SCORE less the number of plies to the end
+of the game for a win of the player to move, its negative for a loss and 0
+for a draw, so the best moves win soonest and lose latest.
+"""
+from typing import Any, List
+import time
+import numpy as np
+from strategy import WIN_SCORE, state_score
+
+
+class StateGraph:
+    """
+    The graph of positions reachable from a state of a game.
+
+    keys: the key() of every node; node 0 is the starting state
+    index: the node of each key
+    offsets: where each node's edges start in targets and moves, with a
+             final entry for the end of the last node's
+    targets: the node each edge leads to
+    moves: the move each edge makes
+    order: every node, each after all the nodes its edges lead to
+    values: the value of each node for the player to move there, once
+            solve() has run
+    best: the edge of the best move from each node (-1 where the game is
+          over), once solve() has run
+    build_seconds: the seconds taken to build the graph
+    solve_seconds: the seconds taken by the last solve()
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> game = SubtractSquareGame.from_total(6)
+    >>> graph = StateGraph(game)
+    >>> graph.node_count, graph.edge_count
+    (10, 11)
+    >>> graph.solve()
+    9997
+    >>> graph.best_move(game.current_state)
+    1
+    """
+    keys: List[Any]
+    index: dict
+    offsets: np.ndarray
+    targets: np.ndarray
+    moves: list
+    order: np.ndarray
+    values: np.ndarray
+    best: np.ndarray
+    build_seconds: float
+    solve_seconds: float
+
+    def __init__(self, game: Any, state: Any = None) -> None:
+        """
+        Build the graph of the positions of game reachable from state, or
+        from game's current state if state is None
+        """
+        started = time.perf_counter()
+        if state is None:
+            state = game.current_state
+        self.keys = [state.key()]
+        self.index = {self.keys[0]: 0}
+        children = [[]]
+        scores = [state_score(game, state)]
+        order = []
+
+        # depth-first, with each stack entry a node, its state and the
+        # moves out of it still to follow
+        stack = [(0, state, iter(state.get_possible_moves())
+                  if scores[0] is None else iter(()))]
+        while stack:
+            node, state, moves = stack[-1]
+            for move in moves:
+                child = state.make_move(move)
+                key = child.key()
+                if key in self.index:
+                    children[node].append((self.index[key], move))
+                    continue
+                new = len(self.keys)
+                self.index[key] = new
+                self.keys.append(key)
+                children.append([])
+                scores.append(state_score(game, child))
+                children[node].append((new, move))
+                if scores[new] is None:
+                    stack.append((new, child,
+                                  iter(child.get_possible_moves())))
+                else:
+                    order.append(new)
+                break
+            else:
+                stack.pop()
+                order.append(node)
+
+        counts = [len(edges) for edges in children]
+        self.offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.targets = np.fromiter(
+            (target for edges in children for target, _ in edges),
+            dtype=np.int32, count=int(self.offsets[-1]))
+        self.moves = [move for edges in children for _, move in edges]
+        self.order = np.array(order, dtype=np.int32)
+        self._terminal = scores
+        self.values = None
+        self.best = None
+        self.solve_seconds = 0.0
+        self.build_seconds = time.perf_counter() - started
+
+    @property
+    def node_count(self) -> int:
+        """
+        Return the number of distinct positions in the graph
+        """
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Return the number of moves between them
+        """
+        return len(self.targets)
+
+    def solve(self) -> int:
+        """
+        Compute the value and best move of every node, returning the value
+        of the starting state
+        """
+        started = time.perf_counter()
+        values = [0] * self.node_count
+        best = [-1] * self.node_count
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        for node in self.order.tolist():
+            terminal = self._terminal[node]
+            if terminal is not None:
+                values[node] = terminal * WIN_SCORE
+                continue
+            value = -WIN_SCORE - 1
+            for edge in range(offsets[node], offsets[node + 1]):
+                score = -values[targets[edge]]
+                # one ply further from the end
+                score -= (score > 0) - (score < 0)
+                if score > value:
+                    value, best[node] = score, edge
+            values[node] = value
+        self.values = np.array(values, dtype=np.int32)
+        self.best = np.array(best, dtype=np.int32)
+        self.solve_seconds = time.perf_counter() - started
+        return values[0]
+
+    def value(self, state: Any) -> int:
+        """
+        Return the value of state, a node of the solved graph
+        """
+        return int(self.values[self.index[state.key()]])
+
+    def best_move(self, state: Any) -> Any:
+        """
+        Return the best move from state, a node of the solved graph, or
+        None if the game is over there
+        """
+        edge = self.best[self.index[state.key()]]
+        return None if edge < 0 else self.moves[edge]
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
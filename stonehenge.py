@@ -1,4 +1,5 @@
 """A game of Stonehenge"""
+import copy
 import math
 from game import Game
 from stonehenge_state import StonehengeState
@@ -28,7 +29,25 @@ class Stonehenge(Game):
         Initialize a game of Stonehenge
 
         """
-        b_length = int(input("Enter the length of the board: "))
+        self._start(is_p1, int(input("Enter the length of the board: ")))
+
+    @classmethod
+    def from_length(cls, b_length: int, is_p1: bool = True) -> "Stonehenge":
+        """
+        Return a new game on a board of length b_length, without asking
+        for it
+
+        >>> Stonehenge.from_length(1).current_state.get_possible_moves()
+        ['A', 'B', 'C']
+        """
+        game = cls.__new__(cls)
+        game._start(is_p1, b_length)
+        return game
+
+    def _start(self, is_p1: bool, b_length: int) -> None:
+        """
+        Set up the empty board of length b_length, p1 to move if is_p1
+        """
         p1_count = 0
         p2_count = 0
         self.hoz_lines = self.generate_hoz(b_length)
@@ -38,6 +57,32 @@ class Stonehenge(Game):
                                              p1_count, p2_count, self.hoz_lines,
                                              self.right_lines, self.left_lines)
 
+    def __copy__(self) -> "Stonehenge":
+        """
+        Return a shallow copy of self, sharing its lines and current state
+        """
+        game = Stonehenge.__new__(Stonehenge)
+        game.__dict__.update(self.__dict__)
+        return game
+
+    def __deepcopy__(self, memo: dict) -> "Stonehenge":
+        """
+        Return a copy of self sharing nothing mutable with it. Leylines
+        the current state shares with the starting lines stay shared in
+        the copy.
+        """
+        game = Stonehenge.__new__(Stonehenge)
+        memo[id(self)] = game
+        for name, value in self.__dict__.items():
+            if name == 'current_state':
+                value = value.copy(memo)
+            elif name in ('hoz_lines', 'right_lines', 'left_lines'):
+                value = [copy.deepcopy(ley, memo) for ley in value]
+            else:
+                value = copy.deepcopy(value, memo)
+            setattr(game, name, value)
+        return game
+
     def get_instructions(self) -> str:
         """x`
         Overrides SuperClass method
@@ -0,0 +1,259 @@
+"""
+Perfect hashing of Stonehenge positions.
+
+A StonehengeRanker numbers the positions of one board densely, from 0 to
+size - 1, and turns a number back into its position, so that solved values
+or visit marks for a whole board fit in flat arrays indexed by rank.
+
+A position is the owner of every cell (none, p1 or p2), the player to move
+and, for even leylines that filled up evenly, who reached half first. The
+claim counts nearly fix the player to move (whoever moved first has made
+as many claims as the other, or one more), so positions are numbered in
+blocks of equal claim counts and mover, and only the owner assignments
+with those counts are numbered inside a block. The blocks run in order of
+the number of claimed cells, p1-to-move first. Within a block, positions
+are numbered in lexicographic order of their cell owners (0 for none, 1
+for p1, 2 for p2). Of the ways of splitting a position's evenly filled
+leylines between the players, only the number p1 holds changes the game
+(the scores), so each position takes one number per possible count and
+unrank() gives p1 the first ones in leyline order.
+
+Every position reachable in play has a rank. Some positions that cannot be
+reached (play carrying on after the game was won) have ranks too: the
+numbering only leaves out claim counts that cannot happen.
+"""
+from typing import List, Tuple
+import math
+from leyline import Leyline
+from stonehenge_state import StonehengeState
+
+
+def _multinomial(total: int, first: int, second: int) -> int:
+    """
+    Return the number of ways to give first of total cells to p1 and
+    second of them to p2, leaving the rest unclaimed
+
+    >>> _multinomial(4, 1, 2)
+    12
+    >>> _multinomial(2, 2, 1)
+    0
+    """
+    if first < 0 or second < 0 or first + second > total:
+        return 0
+    return math.comb(total, first) * math.comb(total - first, second)
+
+
+class StonehengeRanker:
+    """
+    A perfect hash of the positions of one Stonehenge board.
+
+    topology: the board's cells and leylines
+    size: the number of ranks, so every rank is in range(size)
+    blocks: (claimed cells, p1's claims, p2's claims, whether p1 is to
+            move, first rank) for every block of positions, in order
+
+    >>> from stonehenge import Stonehenge
+    >>> s = Stonehenge.from_length(1).current_state
+    >>> ranker = StonehengeRanker(s)
+    >>> ranker.size
+    50
+    >>> ranker.rank(s), ranker.rank(s.make_move('A'))
+    (0, 7)
+    >>> ranker.unrank(7).key() == s.make_move('A').key()
+    True
+    """
+    topology: object
+    size: int
+    blocks: List[Tuple[int, int, int, bool, int]]
+
+    def __init__(self, state: StonehengeState) -> None:
+        """
+        Initialize a ranker for the board of state
+        """
+        self.topology = state.topology
+        self._b_length = state.b_length
+        self._even = [k for k, line in enumerate(self.topology.lines)
+                      if len(line) % 2 == 0]
+        # the cells of each even leyline at or after each cell index
+        cells = len(self.topology.cells)
+        self._later = [[sum(1 for i in self.topology.lines[k] if i >= pos)
+                        for pos in range(cells + 1)] for k in self._even]
+
+        self.blocks = []
+        self.size = 0
+        for claimed in range(cells + 1):
+            if claimed % 2 == 0:
+                counts = [(claimed // 2, claimed // 2, True),
+                          (claimed // 2, claimed // 2, False)]
+            else:
+                counts = [(claimed // 2, claimed // 2 + 1, True),
+                          (claimed // 2 + 1, claimed // 2, False)]
+            for first, second, p1_turn in counts:
+                self.blocks.append((claimed, first, second, p1_turn,
+                                    self.size))
+                self.size += self._weight(0, first, second, self._tally([]))
+
+    def _tally(self, owners: List[int]) -> List[Tuple[int, int, bool]]:
+        """
+        Return, for every even leyline, the cells p1 and p2 hold on it
+        among the first len(owners) cells and whether one of those is
+        unclaimed
+        """
+        tally = []
+        for k in self._even:
+            held = [owners[i] for i in self.topology.lines[k]
+                    if i < len(owners)]
+            tally.append((held.count(1), held.count(2), 0 in held))
+        return tally
+
+    def _weight(self, pos: int, first: int, second: int,
+                tally: List[Tuple[int, int, bool]]) -> int:
+        """
+        Return the number of ranks taken by positions whose owners of the
+        cells before pos are fixed (as summed up in tally) and which give
+        first more cells to p1 and second more to p2 among the rest: one
+        for each owner assignment, plus one for each evenly filled leyline
+        in it
+        """
+        rest = len(self.topology.cells) - pos
+        weight = _multinomial(rest, first, second)
+        for j, k in enumerate(self._even):
+            held1, held2, gap = tally[j]
+            half = len(self.topology.lines[k]) // 2
+            more1, more2 = half - held1, half - held2
+            if gap or more1 < 0 or more2 < 0:
+                continue
+            open_cells = self._later[j][pos]
+            if more1 + more2 != open_cells:
+                continue
+            weight += math.comb(open_cells, more1) * _multinomial(
+                rest - open_cells, first - more1, second - more2)
+        return weight
+
+    def _place(self, tally: List[Tuple[int, int, bool]], cell: int,
+               owner: int) -> List[Tuple[int, int, bool]]:
+        """
+        Return tally with cell given to owner
+        """
+        placed = tally[:]
+        for j, k in enumerate(self._even):
+            if cell in self.topology.lines[k]:
+                held1, held2, gap = placed[j]
+                placed[j] = (held1 + (owner == 1), held2 + (owner == 2),
+                             gap or owner == 0)
+        return placed
+
+    def _tied(self, owners: List[int]) -> List[int]:
+        """
+        Return the even leylines that owners fill evenly
+        """
+        return [k for k in self._even
+                if all(owners[i] for i in self.topology.lines[k])
+                and sum(owners[i] == 1 for i in self.topology.lines[k])
+                * 2 == len(self.topology.lines[k])]
+
+    def rank(self, state: StonehengeState) -> int:
+        """
+        Return the rank of state, a position on this ranker's board
+
+        Raise a ValueError if no position with state's claim counts and
+        player to move can be reached.
+        """
+        owners = [0] * len(self.topology.cells)
+        for ley, cells in zip(state.h_lines, self.topology.lines):
+            for letter, cell in zip(ley.letters, cells):
+                if letter in ('1', '2'):
+                    owners[cell] = int(letter)
+        first, second = owners.count(1), owners.count(2)
+        for claimed, n1, n2, p1_turn, start in self.blocks:
+            if (n1, n2, p1_turn) == (first, second, state.p1_turn):
+                break
+        else:
+            raise ValueError('no reachable position has {} claims for p1 '
+                             'and {} for p2 with {} to move'.format(
+                                 first, second,
+                                 state.get_current_player_name()))
+
+        index, tally = start, self._tally([])
+        for cell, owner in enumerate(owners):
+            for smaller in range(owner):
+                left1, left2 = first - (smaller == 1), second - (smaller == 2)
+                index += self._weight(cell + 1, left1, left2,
+                                      self._place(tally, cell, smaller))
+            tally = self._place(tally, cell, owner)
+            first -= owner == 1
+            second -= owner == 2
+
+        lines = state.h_lines + state.r_lines + state.l_lines
+        return index + sum(1 for k in self._tied(owners)
+                           if lines[k].value == '1')
+
+    def unrank(self, index: int) -> StonehengeState:
+        """
+        Return the position of rank index
+
+        Raise a ValueError if index is not in range(size).
+        """
+        if not 0 <= index < self.size:
+            raise ValueError('rank {} is not in range({})'.format(
+                index, self.size))
+        for claimed, first, second, p1_turn, start in reversed(self.blocks):
+            if start <= index:
+                break
+        index -= start
+
+        owners, tally = [], self._tally([])
+        for cell in range(len(self.topology.cells)):
+            for owner in range(3):
+                left1, left2 = first - (owner == 1), second - (owner == 2)
+                placed = self._place(tally, cell, owner)
+                weight = self._weight(cell + 1, left1, left2, placed)
+                if index < weight:
+                    break
+                index -= weight
+            owners.append(owner)
+            tally, first, second = placed, left1, left2
+        return self._build(owners, p1_turn, self._tied(owners)[:index])
+
+    def _build(self, owners: List[int], p1_turn: bool,
+               won_by_p1: List[int]) -> StonehengeState:
+        """
+        Return the position with owners and p1_turn in which p1 holds the
+        evenly filled leylines won_by_p1 and p2 the others
+        """
+        topology = self.topology
+        need = topology.need
+        tied = self._tied(owners)
+        lines, claims, scores = [], [[], []], [0, 0]
+        per_direction = len(topology.lines) // 3
+        for k, cells in enumerate(topology.lines):
+            ley = Leyline(k % per_direction + 1)
+            ley.letters = [str(owners[i]) if owners[i]
+                           else topology.cells[i] for i in cells]
+            held = [ley.letters.count('1'), ley.letters.count('2')]
+            if k in tied:
+                ley.value = '1' if k in won_by_p1 else '2'
+            elif held[0] >= need[k]:
+                ley.value = '1'
+            elif held[1] >= need[k]:
+                ley.value = '2'
+            if type(ley.value) != int:
+                scores[int(ley.value) - 1] += 1
+            claims[0].append(held[0])
+            claims[1].append(held[1])
+            lines.append(ley)
+
+        state = StonehengeState(
+            p1_turn, self._b_length, scores[0], scores[1],
+            lines[:per_direction], lines[per_direction:2 * per_direction],
+            lines[2 * per_direction:], topology, claims)
+        state.free = sum(1 << i for i, owner in enumerate(owners)
+                         if not owner)
+        if max(scores) >= topology.threshold:
+            state.free = 0
+        return state
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
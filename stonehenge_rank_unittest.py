@@ -0,0 +1,89 @@
+"""
+Unittests for the perfect hashing of Stonehenge positions in
+stonehenge_rank.py.
+"""
+import unittest
+from unittest.mock import patch
+
+from game_interface import playable_games
+from stonehenge_rank import StonehengeRanker
+from stonehenge_state_unittest import random_positions
+
+StonehengeGame = playable_games['h']
+
+
+def position(state):
+    """
+    Return what identifies state as a position: its cell owners, player to
+    move and scores.
+    """
+    return state.key().split('|')[0], state.p1_turn, state.p1_score, \
+        state.p2_score
+
+
+def reachable(length: str):
+    """
+    Return every state reachable on a board of length, with either player
+    moving first.
+    """
+    states = {}
+    for is_p1 in (True, False):
+        with patch('builtins.input', return_value=length):
+            frontier = [StonehengeGame(is_p1).current_state]
+        while frontier:
+            state = frontier.pop()
+            if state.key() not in states:
+                states[state.key()] = state
+                frontier.extend(state.make_move(m)
+                                for m in state.get_possible_moves())
+    return list(states.values())
+
+
+class StonehengeRankUnitTests(unittest.TestCase):
+    def test_reachable_positions_ranked_densely(self):
+        """
+        Test that distinct reachable positions get distinct ranks in
+        range(size) and that unrank() gives each position back.
+        """
+        states = reachable('2')
+        ranker = StonehengeRanker(states[0])
+        ranks = {}
+        for state in states:
+            index = ranker.rank(state)
+            self.assertIn(index, range(ranker.size))
+            self.assertEqual(ranks.setdefault(index, position(state)),
+                             position(state))
+            back = ranker.unrank(index)
+            self.assertEqual(position(back), position(state))
+            self.assertEqual(back.free, state.free)
+            self.assertEqual(back.dead, state.dead)
+            self.assertEqual(back.p1_claims, state.p1_claims)
+        self.assertEqual(len(ranks), len({position(s) for s in states}))
+
+    def test_every_rank_round_trips(self):
+        """
+        Test that rank(unrank(i)) == i for every rank of a small board.
+        """
+        ranker = StonehengeRanker(reachable('2')[0])
+        for index in range(ranker.size):
+            self.assertEqual(ranker.rank(ranker.unrank(index)), index)
+        with self.assertRaises(ValueError):
+            ranker.unrank(ranker.size)
+
+    def test_random_positions_round_trip(self):
+        """
+        Test that positions from random play on larger boards come back
+        from unrank() with the same moves and outcome.
+        """
+        for game, state in random_positions(200, seed=4):
+            ranker = StonehengeRanker(state)
+            back = ranker.unrank(ranker.rank(state))
+            self.assertEqual(position(back), position(state))
+            self.assertEqual(back.get_possible_moves(),
+                             state.get_possible_moves())
+            self.assertEqual(back.decided(), state.decided())
+            self.assertEqual(game.is_over(back), game.is_over(state))
+
+
+if __name__ == "__main__":
+    unittest.main()
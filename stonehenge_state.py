@@ -1,9 +1,10 @@
 """A state of a game of Stonehenge"""
-from typing import Any, List
+from typing import Any, Dict, List
 import copy
 import math
 from leyline import Leyline
 from game_state import GameState
+from stonehenge_topology import StonehengeTopology, get_topology
 
 
 class StonehengeState(GameState):
@@ -16,7 +17,8 @@ class StonehengeState(GameState):
              'X', 'Y', 'Z']
 
     def __init__(self, is_p1: bool, b_length: int, p1_score, p2_score, h_lines,
-                 r_lines, l_lines) -> None:
+                 r_lines, l_lines, topology: StonehengeTopology = None,
+                 claims: List[List[int]] = None) -> None:
         """
         Initialize a StonehengeState
 
@@ -27,7 +29,16 @@ class StonehengeState(GameState):
         h_lines: list of horizontal leylines
         r_lines: list of right_diagonal leylines
         l_lines: list of left_diagonal leylines
-        possible_moves: the possible moves
+        free: a bitmask of the unclaimed cells, bit i for
+              topology.cells[i] (0 once the game is over)
+        possible_moves: the possible moves, as a tuple built from free
+                        the first time it is asked for
+        dead: a bitmask of the cells all of whose leylines have been
+              captured, claimed or not; claiming one only passes the turn
+        topology: the cells and leylines of the board, shared by every
+                  state of a game (built from the lines if not given)
+        p1_claims: number of cells p1 has claimed on each leyline
+        p2_claims: number of cells p2 has claimed on each leyline
 
         Extends class GameState
 
@@ -57,8 +68,30 @@ class StonehengeState(GameState):
         self.h_lines = h_lines
         self.r_lines = r_lines
         self.l_lines = l_lines
-        num = int(0.5*(b_length**2 + 5*b_length))
-        self.possible_moves = self.ALPHA[:num]
+        self._moves = None
+        lines = h_lines + r_lines + l_lines
+        if topology is None:
+            topology = get_topology(b_length,
+                                    [ley.letters for ley in lines])
+        self.topology = topology
+        self.free = 0
+        if max(p1_score, p2_score) < topology.threshold:
+            for ley in h_lines:
+                for letter in ley.letters:
+                    if letter not in ('1', '2'):
+                        self.free |= 1 << topology.index[letter]
+        if claims is None:
+            claims = [[ley.letters.count('1') for ley in lines],
+                      [ley.letters.count('2') for ley in lines]]
+        self.p1_claims, self.p2_claims = claims
+        self._captures = {}
+        self._search_moves = None
+        self._decided = None
+        self.dead = 0
+        if any(type(ley.value) != int for ley in lines):
+            for i, pairs in enumerate(topology.cell_lines):
+                if all(type(lines[k].value) != int for k, _ in pairs):
+                    self.dead |= 1 << i
 
     def __repr__(self) -> str:
         """
@@ -94,6 +127,28 @@ class StonehengeState(GameState):
 
         return s
 
+    def key(self) -> str:
+        """
+        Return a compact key for self: the owner of every cell, the owner
+        of every leyline and the current player
+
+        Overrides SuperClass method
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(1).current_state
+        >>> s.key()
+        '000|000000|1'
+        >>> s.make_move('A').key()
+        '100|101001|2'
+        """
+        cells = ''.join(c if c in ('1', '2') else '0'
+                        for ley in self.h_lines for c in ley.letters)
+        lines = ''.join('0' if type(ley.value) == int else ley.value
+                        for ley in self.h_lines + self.r_lines + self.l_lines)
+        if self.p1_turn:
+            return cells + '|' + lines + '|1'
+        return cells + '|' + lines + '|2'
+
     def __str__(self) -> str:
         """
         Return a string representation of self
@@ -129,6 +184,72 @@ class StonehengeState(GameState):
         #
         # s += "{},{},{}".format(self.p1_turn, self.p1_score, self.p2_score)
 
+    @property
+    def possible_moves(self) -> tuple:
+        """
+        Return the unclaimed cells, in board order, as a tuple shared by
+        every caller
+        """
+        if self._moves is None:
+            cells, free = self.topology.cells, self.free
+            self._moves = tuple(cells[i] for i in range(len(cells))
+                                if free >> i & 1)
+        return self._moves
+
+    def iter_moves(self) -> Any:
+        """
+        Return an iterator over the possible moves that does not copy them
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state
+        >>> list(s.make_move('B').iter_moves())
+        ['A', 'C', 'D', 'E', 'F', 'G']
+        """
+        return iter(self.possible_moves)
+
+    def search_moves(self) -> list:
+        """
+        Return the moves a search needs to try: every possible move on a
+        live cell, and a single dead cell standing for all of them, since
+        claiming any dead cell leads to an equivalent position
+
+        Overrides SuperClass method
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(3).current_state
+        >>> for m in ['F', 'K', 'E', 'H', 'B', 'L', 'G']:
+        ...     s = s.make_move(m)
+        >>> s.get_possible_moves(), s.search_moves()
+        (['A', 'C', 'D', 'I', 'J'], ['A', 'C', 'D', 'I'])
+        """
+        if self._search_moves is None:
+            cells, free = self.topology.cells, self.free
+            dead = free & self.dead
+            moves = [cells[i] for i in range(len(cells))
+                     if free >> i & 1 and not dead >> i & 1]
+            if dead:
+                moves.append(cells[(dead & -dead).bit_length() - 1])
+            self._search_moves = moves
+        return self._search_moves[:]
+
+    def is_valid_move(self, move: Any) -> bool:
+        """
+        Return whether move is an unclaimed cell, in constant time
+
+        Overrides SuperClass method
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(1).current_state
+        >>> s.is_valid_move('A'), s.make_move('A').is_valid_move('A')
+        (True, False)
+        >>> s.is_valid_move('Z'), s.is_valid_move(None)
+        (False, False)
+        """
+        if not isinstance(move, str):
+            return False
+        i = self.topology.index.get(move)
+        return i is not None and self.free >> i & 1 == 1
+
     def get_possible_moves(self) -> list:
         """
         Overrides SuperClass method
@@ -149,7 +270,7 @@ class StonehengeState(GameState):
         >>> s.get_possible_moves()
         ['A', 'B', 'C']
         """
-        return self.possible_moves[:]
+        return list(self.possible_moves)
 
     def change_leyline(self, ley: Leyline) -> None:
         """
@@ -244,30 +365,197 @@ class StonehengeState(GameState):
         >>> s1.p1_turn
         false
         """
-        h_lines = copy.deepcopy(self.h_lines)
-        l_lines = copy.deepcopy(self.l_lines)
-        r_lines = copy.deepcopy(self.r_lines)
+        if not self.is_valid_move(move):
+            raise ValueError('{!r} is not a possible move'.format(move))
+        ss = self.copy()
+        ss.free = self.free & ~(1 << self.topology.index[move])
 
-        ss = StonehengeState(self.p1_turn, self.b_length, self.p1_score,
-                             self.p2_score, h_lines, r_lines,
-                             l_lines)
-
-        ss.change_letter(move, ss.h_lines[:])
-        ss.change_letter(move, ss.r_lines[:])
-        ss.change_letter(move, ss.l_lines[:])
-
-        moves = self.get_possible_moves()[:]
-        ss.possible_moves = moves
-        ss.possible_moves.remove(move)
+        ss._claim(move)
         ss.p1_turn = not ss.p1_turn
 
-        threshold = math.ceil(3 * (ss.b_length + 1) / 2)
+        if ss.p1_score >= self.topology.threshold \
+                or ss.p2_score >= self.topology.threshold:
+            ss.free = 0
 
-        if ss.p1_score >= threshold or ss.p2_score >= threshold:
-            ss.possible_moves = []
+        return ss
 
+    def __copy__(self) -> "StonehengeState":
+        """
+        Return a shallow copy of self, sharing its leylines and claim
+        counts; cached results other than the possible moves start empty
+        """
+        ss = StonehengeState.__new__(StonehengeState)
+        ss.__dict__.update(self.__dict__)
+        ss._search_moves = None
+        ss._captures = {}
+        ss._decided = None
         return ss
 
+    def copy(self, memo: dict = None) -> "StonehengeState":
+        """
+        Return a copy of self that shares nothing mutable with it: the
+        leylines and claim counts are copied, the topology and the board
+        length are shared, and cached results start empty. Leylines
+        already in memo (a copy.deepcopy memo) are taken from it.
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state.make_move('A')
+        >>> c = s.copy()
+        >>> c.key() == s.key(), c.topology is s.topology
+        (True, True)
+        >>> c.h_lines[0] is s.h_lines[0], c.p1_claims is s.p1_claims
+        (False, False)
+        """
+        ss = StonehengeState.__new__(StonehengeState)
+        ss.p1_turn = self.p1_turn
+        ss.b_length = self.b_length
+        ss.p1_score = self.p1_score
+        ss.p2_score = self.p2_score
+        if memo is None:
+            ss.h_lines = [ley.copy() for ley in self.h_lines]
+            ss.r_lines = [ley.copy() for ley in self.r_lines]
+            ss.l_lines = [ley.copy() for ley in self.l_lines]
+        else:
+            memo[id(self)] = ss
+            ss.h_lines = [copy.deepcopy(ley, memo) for ley in self.h_lines]
+            ss.r_lines = [copy.deepcopy(ley, memo) for ley in self.r_lines]
+            ss.l_lines = [copy.deepcopy(ley, memo) for ley in self.l_lines]
+        ss.topology = self.topology
+        ss.p1_claims = self.p1_claims[:]
+        ss.p2_claims = self.p2_claims[:]
+        ss.free = self.free
+        ss.dead = self.dead
+        ss._moves = None
+        ss._search_moves = None
+        ss._captures = {}
+        ss._decided = None
+        return ss
+
+    def __deepcopy__(self, memo: dict) -> "StonehengeState":
+        """
+        Return copy(memo), for copy.deepcopy
+        """
+        return self.copy(memo)
+
+    def _claim(self, move: str) -> None:
+        """
+        Claim the cell move for the current player, updating its leylines,
+        the claim counts and the scores; what was worked out from them
+        before is dropped. The free cells and the turn are left to
+        make_move.
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(1).current_state
+        >>> s._claim('C')
+        >>> s.h_lines[1].letters, s.h_lines[1].value
+        (['1'], '1')
+        >>> s.p1_score, s.p1_claims
+        (3, [0, 1, 0, 1, 0, 1])
+        """
+        if self.p1_turn:
+            player, claims = '1', self.p1_claims
+        else:
+            player, claims = '2', self.p2_claims
+        lines = self.h_lines + self.r_lines + self.l_lines
+        need = self.topology.need
+        self._captures = {}
+        self._search_moves = None
+        self._decided = None
+
+        for k, pos in self.topology.cell_lines[self.topology.index[move]]:
+            ley = lines[k]
+            ley.letters[pos] = player
+            claims[k] += 1
+            if claims[k] >= need[k] and type(ley.value) == int:
+                ley.value = player
+                if self.p1_turn:
+                    self.p1_score += 1
+                else:
+                    self.p2_score += 1
+                self._mark_dead(k, lines)
+
+    def ceiling(self, player: str) -> int:
+        """
+        Return the most leylines player could end the game with: those
+        already captured plus as many open ones as their remaining claims
+        could complete. The leylines of one direction share no cells, so
+        in each direction at most the leylines with the fewest missing
+        claims, up to player's number of turns left, can be completed.
+
+        Precondition: player is 'p1' or 'p2'
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state
+        >>> for m in ['E', 'B', 'A']:
+        ...     s = s.make_move(m)
+        >>> s.p2_score, s.ceiling('p2'), s.topology.threshold
+        (1, 4, 5)
+        """
+        if player == 'p1':
+            score, mine, theirs = self.p1_score, self.p1_claims, \
+                self.p2_claims
+        else:
+            score, mine, theirs = self.p2_score, self.p2_claims, \
+                self.p1_claims
+        free = bin(self.free).count('1')
+        if self.get_current_player_name() == player:
+            turns = (free + 1) // 2
+        else:
+            turns = free // 2
+        lines = self.h_lines + self.r_lines + self.l_lines
+        need, cells = self.topology.need, self.topology.lines
+        per_direction = len(lines) // 3
+        for start in range(0, len(lines), per_direction):
+            missing = sorted(
+                need[k] - mine[k] for k in range(start, start + per_direction)
+                if type(lines[k].value) == int
+                and len(cells[k]) - theirs[k] >= need[k])
+            left = turns
+            for m in missing:
+                if m > left:
+                    break
+                left -= m
+                score += 1
+        return score
+
+    def decided(self) -> Any:
+        """
+        Return the player who is certain to win from here, or None if it
+        is still open: the other player's ceiling is below the threshold.
+        Every leyline is captured by the time the board fills, so one of
+        the players does reach it.
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state
+        >>> s.decided() is None
+        True
+        >>> for m in ['E', 'B', 'A']:
+        ...     s = s.make_move(m)
+        >>> s.decided(), s.p1_score, s.p2_score
+        ('p1', 3, 1)
+        """
+        if self._decided is None:
+            threshold = self.topology.threshold
+            winner = None
+            if self.p1_score >= threshold or self.ceiling('p2') < threshold:
+                winner = 'p1'
+            elif self.p2_score >= threshold \
+                    or self.ceiling('p1') < threshold:
+                winner = 'p2'
+            # a tuple, since None is a result of its own
+            self._decided = (winner,)
+        return self._decided[0]
+
+    def _mark_dead(self, k: int, lines: List[Leyline]) -> None:
+        """
+        Add the cells of the newly captured leyline k whose other leylines
+        are captured too to dead
+        """
+        for i in self.topology.lines[k]:
+            if all(type(lines[j].value) != int
+                   for j, _ in self.topology.cell_lines[i]):
+                self.dead |= 1 << i
+
     def get_leyline_value(self, lst: List[Leyline]) -> List:
         """
         Return the values of the leylines of L.
@@ -303,6 +591,9 @@ class StonehengeState(GameState):
         Look 1-2 states ahead and return a rough estimate of
         the current state's score
 
+        Both lookaheads are answered from the claim counts, without
+        building any of the states they look at.
+
         >>> h_lines = [Leyline(), Leyline()]
         >>> h_lines[0].letters = ['A', 'B']
         >>> h_lines[1].letters = ['C']
@@ -317,16 +608,113 @@ class StonehengeState(GameState):
         >>> s.rough_outcome()
         1
         """
-        threshold = math.ceil(3 * (self.b_length + 1) / 2)
-        if self.p1_score >= threshold or self.p1_score >= threshold:
-            return -1
-        elif any([self.check_good_move(m) for m in self.possible_moves]):
-            return 1
-        elif all([s.check_good_move(m) for m in s.possible_moves] for
-                 s in self.list_states()):
-            return -1
+        threshold = self.topology.threshold
+        if self.p1_score >= threshold or self.p2_score >= threshold:
+            return self.LOSE
+
+        me = self.get_current_player_name()
+        if self.decided() is not None:
+            return self.WIN if self.decided() == me else self.LOSE
+        if self.winning_moves(me):
+            return self.WIN
+        if all(self.allows_win(m) for m in self.search_moves()):
+            return self.LOSE
+
+        return self.DRAW
+
+    def capture_counts(self, player: str) -> Dict[str, int]:
+        """
+        Return the cells that would capture at least one leyline for
+        player if player claimed them now, mapped to the number of
+        leylines each would capture
 
-        return 0
+        Precondition: player is 'p1' or 'p2'
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state.make_move('A')
+        >>> sorted(s.capture_counts('p1').items())
+        [('B', 1), ('C', 1), ('D', 1), ('E', 2), ('F', 2), ('G', 3)]
+        """
+        if player not in self._captures:
+            if player == 'p1':
+                claims = self.p1_claims
+            else:
+                claims = self.p2_claims
+            self._captures[player] = self._count_captures(claims)
+        return self._captures[player]
+
+    def _count_captures(self, claims: List[int]) -> Dict[str, int]:
+        """
+        Return capture_counts for the player who has made claims
+        """
+        counts = {}
+        if not self.free:
+            return counts
+        lines = self.h_lines + self.r_lines + self.l_lines
+        need = self.topology.need
+        for k, ley in enumerate(lines):
+            if type(ley.value) != int or claims[k] + 1 < need[k]:
+                continue
+            for letter in ley.letters:
+                if letter not in ('1', '2'):
+                    counts[letter] = counts.get(letter, 0) + 1
+        return counts
+
+    def winning_moves(self, player: str) -> List[str]:
+        """
+        Return the cells that would win the game for player if player
+        claimed them now
+
+        Precondition: player is 'p1' or 'p2'
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state
+        >>> s = s.make_move('A').make_move('B')
+        >>> s.winning_moves('p1')
+        ['G']
+        """
+        if player == 'p1':
+            needed = self.topology.threshold - self.p1_score
+        else:
+            needed = self.topology.threshold - self.p2_score
+        return sorted(cell for cell, count in
+                      self.capture_counts(player).items() if count >= needed)
+
+    def allows_win(self, move: str) -> bool:
+        """
+        Return whether the other player could win immediately after the
+        current player claims move, without building the resulting state
+
+        >>> from stonehenge import Stonehenge
+        >>> s = Stonehenge.from_length(2).current_state
+        >>> for m in ['D', 'A', 'C', 'E', 'G']:
+        ...     s = s.make_move(m)
+        >>> s.allows_win('B'), s.allows_win('F')
+        (True, True)
+        """
+        if self.p1_turn:
+            other, mine, theirs = 'p2', self.p1_claims, self.p2_claims
+            score = self.p2_score
+        else:
+            other, mine, theirs = 'p1', self.p2_claims, self.p1_claims
+            score = self.p1_score
+        needed = self.topology.threshold - score
+        counts = self.capture_counts(other)
+        index, need = self.topology.index, self.topology.need
+        lines = self.h_lines + self.r_lines + self.l_lines
+
+        # leylines other could take that the current player takes first
+        taken = {k for k, _ in self.topology.cell_lines[index[move]]
+                 if type(lines[k].value) == int and mine[k] + 1 >= need[k]
+                 and theirs[k] + 1 >= need[k]}
+        for cell, count in counts.items():
+            if cell == move or count < needed:
+                continue
+            lost = sum(1 for k, _ in self.topology.cell_lines[index[cell]]
+                       if k in taken)
+            if count - lost >= needed:
+                return True
+        return False
 
     def list_states(self) -> list:
         """
@@ -400,10 +788,7 @@ class StonehengeState(GameState):
         True
 
         """
-        new_state = self.give_copy(move)
-        threshold = math.ceil(3 * (new_state.b_length + 1) / 2)
-        return new_state.p1_score >= threshold \
-               or new_state.p2_score >= threshold
+        return move in self.winning_moves(self.get_current_player_name())
 
     def one(self) -> str:
         """
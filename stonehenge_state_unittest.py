@@ -0,0 +1,180 @@
+"""
+Unittests for StonehengeState's bookkeeping, checked against the result of
+actually applying moves with make_move.
+"""
+import copy
+import random
+import unittest
+from unittest.mock import patch
+
+from game_interface import playable_games
+from stonehenge_state import StonehengeState
+
+StonehengeGame = playable_games['h']
+
+
+def random_positions(count: int, seed: int = 0):
+    """
+    Yield count (game, state) pairs reached by random play on boards of
+    length 1 to 4.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        with patch('builtins.input', return_value=str(rng.randint(1, 4))):
+            game = StonehengeGame(rng.random() < 0.5)
+        state = game.current_state
+        for _ in range(rng.randint(0, len(state.get_possible_moves()))):
+            if not state.get_possible_moves():
+                break
+            state = state.make_move(rng.choice(state.get_possible_moves()))
+        yield game, state
+
+
+class StonehengeStateUnitTests(unittest.TestCase):
+    def test_threats_match_make_move(self):
+        """
+        Test that winning_moves and allows_win agree with the states that
+        make_move produces.
+        """
+        for game, state in random_positions(300):
+            moves = state.get_possible_moves()
+            player = state.get_current_player_name()
+            expected = sorted(m for m in moves
+                              if game.is_over(state.make_move(m)))
+            self.assertEqual(state.winning_moves(player), expected)
+            for move in moves:
+                child = state.make_move(move)
+                if game.is_over(child):
+                    continue
+                replies = child.get_possible_moves()
+                self.assertEqual(
+                    state.allows_win(move),
+                    any(game.is_over(child.make_move(r)) for r in replies))
+
+    def test_rough_outcome_range(self):
+        """
+        Test that rough_outcome stays within [LOSE, WIN] and returns WIN
+        exactly when a winning move exists.
+        """
+        for _, state in random_positions(200, seed=1):
+            ro = state.rough_outcome()
+            self.assertIn(ro, (state.LOSE, state.DRAW, state.WIN))
+            if state.get_possible_moves():
+                player = state.get_current_player_name()
+                self.assertEqual(ro == state.WIN,
+                                 bool(state.winning_moves(player))
+                                 or state.decided() == player)
+
+    def test_free_cells_match_board(self):
+        """
+        Test that the possible moves and is_valid_move follow the cells
+        left unclaimed on the board, and are empty once the game is over.
+        """
+        for game, state in random_positions(200, seed=2):
+            unclaimed = [c for ley in state.h_lines for c in ley.letters
+                         if c not in ('1', '2')]
+            if game.is_over(state):
+                unclaimed = []
+            self.assertEqual(state.get_possible_moves(), sorted(unclaimed))
+            self.assertEqual(list(state.iter_moves()), sorted(unclaimed))
+            for cell in state.topology.cells:
+                self.assertEqual(state.is_valid_move(cell),
+                                 cell in unclaimed)
+
+    def test_decided_matches_play_out(self):
+        """
+        Test that a decided position is won by the decided player however
+        it is played out.
+        """
+        def winners(game, state):
+            if game.is_over(state):
+                return {'p1' if state.p1_score > state.p2_score else 'p2'}
+            return set().union(*(winners(game, state.make_move(m))
+                                 for m in state.get_possible_moves()))
+
+        decided = 0
+        for game, state in random_positions(400, seed=5):
+            if state.b_length <= 2 and state.decided() is not None:
+                decided += 1
+                self.assertEqual(winners(game, state), {state.decided()})
+        self.assertGreater(decided, 0)
+
+    def test_dead_cells_match_board(self):
+        """
+        Test that dead holds exactly the cells whose leylines are all
+        captured, and that search_moves keeps every live move and one dead
+        one.
+        """
+        for _, state in random_positions(300, seed=3):
+            lines = state.h_lines + state.r_lines + state.l_lines
+            cells = state.topology.cells
+            dead = {cells[i] for i, pairs
+                    in enumerate(state.topology.cell_lines)
+                    if all(type(lines[k].value) != int for k, _ in pairs)}
+            self.assertEqual({c for i, c in enumerate(cells)
+                              if state.dead >> i & 1}, dead)
+            moves = state.get_possible_moves()
+            search = state.search_moves()
+            self.assertEqual([m for m in search if m not in dead],
+                             [m for m in moves if m not in dead])
+            self.assertEqual(len([m for m in search if m in dead]),
+                             min(1, len([m for m in moves if m in dead])))
+
+    def test_rebuilt_from_claimed_lines(self):
+        """
+        Test that a state built from partly claimed leylines, without a
+        topology, agrees with the state make_move produces, whatever its
+        parent had worked out before.
+        """
+        for _, state in random_positions(100, seed=7):
+            moves = state.get_possible_moves()
+            if not moves:
+                continue
+            player = state.get_current_player_name()
+            state.capture_counts(player)
+            state.winning_moves(player)
+            state.decided()
+            child = state.make_move(moves[0])
+            if not child.free:
+                continue
+            rebuilt = StonehengeState(child.p1_turn, child.b_length,
+                                      child.p1_score, child.p2_score,
+                                      child.h_lines, child.r_lines,
+                                      child.l_lines)
+            self.assertIs(rebuilt.topology, state.topology)
+            self.assertEqual(rebuilt.get_possible_moves(),
+                             child.get_possible_moves())
+            self.assertEqual(rebuilt.capture_counts(player),
+                             child.capture_counts(player))
+            self.assertEqual(rebuilt.winning_moves(player),
+                             child.winning_moves(player))
+            self.assertEqual(rebuilt.decided(), child.decided())
+
+    def test_copies_are_independent(self):
+        """
+        Test that deep copies of states and games match the original and
+        share nothing that claiming a cell changes.
+        """
+        for game, state in random_positions(100, seed=6):
+            if not state.get_possible_moves():
+                continue
+            key = state.key()
+            clone = copy.deepcopy(state)
+            self.assertEqual(clone.key(), key)
+            self.assertEqual(repr(clone), repr(state))
+            for ley in clone.h_lines + clone.r_lines + clone.l_lines:
+                ley.letters[:] = ['1'] * len(ley.letters)
+                ley.value = '1'
+            clone.p1_claims[:] = [0] * len(clone.p1_claims)
+            self.assertEqual(state.key(), key)
+            self.assertEqual(state.p1_claims, copy.copy(state).p1_claims)
+
+            game.current_state = state
+            game_clone = copy.deepcopy(game)
+            self.assertIsNot(game_clone.current_state, state)
+            self.assertEqual(game_clone.current_state.key(), key)
+            self.assertIs(copy.copy(game).current_state, state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""The fixed layout of a Stonehenge board: its cells and leylines"""
+from typing import Dict, List, Tuple
+import math
+
+
+class StonehengeTopology:
+    """
+    The cells of a Stonehenge board and the leylines running through
+    them. A topology never changes once it is built, so every state of a
+    game shares the same one.
+
+    b_length: the board length
+    cells: the letters of the cells, in board order
+    index: the position of each letter in cells
+    lines: the cell indices of every leyline, in the order
+           h_lines + r_lines + l_lines, each in the order of its letters
+    cell_lines: for each cell, the (leyline, position) pairs it lies on
+    need: the number of cells a player must claim to capture each leyline
+    threshold: the number of leylines a player must capture to win
+    """
+    b_length: int
+    cells: List[str]
+    index: Dict[str, int]
+    lines: List[Tuple[int, ...]]
+    cell_lines: List[Tuple[Tuple[int, int], ...]]
+    need: List[int]
+    threshold: int
+
+    def __init__(self, b_length: int, letters: List[List[str]]) -> None:
+        """
+        Initialize a topology for a board of length b_length whose
+        leylines (h, then r, then l) hold letters before any cell has
+        been claimed
+
+        >>> t = StonehengeTopology(1, [['A', 'B'], ['C'], ['A'], ['B', 'C'],\
+        ['B'], ['C', 'A']])
+        >>> t.cells
+        ['A', 'B', 'C']
+        >>> t.cell_lines[2]
+        ((1, 0), (3, 1), (5, 0))
+        >>> t.need
+        [1, 1, 1, 1, 1, 1]
+        >>> t.threshold
+        3
+        """
+        self.b_length = b_length
+        self.cells = sorted({c for line in letters for c in line})
+        self.index = {c: i for i, c in enumerate(self.cells)}
+        self.lines = [tuple(self.index[c] for c in line) for line in letters]
+        cell_lines = [[] for _ in self.cells]
+        for k, line in enumerate(self.lines):
+            for pos, cell in enumerate(line):
+                cell_lines[cell].append((k, pos))
+        self.cell_lines = [tuple(pairs) for pairs in cell_lines]
+        self.need = [math.ceil(0.5 * len(line)) for line in self.lines]
+        self.threshold = math.ceil(3 * (b_length + 1) / 2)
+
+
+_TOPOLOGIES = {}
+
+
+def _board_letters(b_length: int) -> List[List[str]]:
+    """
+    Return the letters of the leylines (h, then r, then l) of the empty
+    Stonehenge board of length b_length
+    """
+    # stonehenge imports this module, through stonehenge_state
+    from stonehenge import Stonehenge
+    game = Stonehenge.__new__(Stonehenge)
+    game.hoz_lines = game.generate_hoz(b_length)
+    lines = game.hoz_lines + game.generate_right_diag_lines(b_length) \
+        + game.generate_left_diag_lines(b_length)
+    return [ley.letters for ley in lines]
+
+
+def get_topology(b_length: int, letters: List[List[str]]) \
+        -> StonehengeTopology:
+    """
+    Return the shared topology for a board of length b_length whose
+    leylines hold letters, building it the first time
+
+    Cells already claimed ('1' or '2' in letters) are taken to be where
+    they are on the board of that length; a ValueError is raised if the
+    unclaimed letters are not where they are on that board.
+
+    >>> get_topology(1, [['1', 'B'], ['C'], ['1'], ['B', 'C'], ['B'],\
+    ['C', '1']]) is get_topology(1, [['A', 'B'], ['C'], ['A'],\
+    ['B', 'C'], ['B'], ['C', 'A']])
+    True
+    """
+    if any(c in ('1', '2') for line in letters for c in line):
+        board = _board_letters(b_length)
+        if [len(line) for line in letters] != [len(line) for line in board] \
+                or any(c not in ('1', '2', b)
+                       for line, board_line in zip(letters, board)
+                       for c, b in zip(line, board_line)):
+            raise ValueError('the leylines are not those of a board of '
+                             'length {}'.format(b_length))
+        letters = board
+    key = (b_length, tuple(tuple(line) for line in letters))
+    if key not in _TOPOLOGIES:
+        _TOPOLOGIES[key] = StonehengeTopology(b_length, letters)
+    return _TOPOLOGIES[key]
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,213 @@
+"""
+Vectorized evaluation of Stonehenge positions with NumPy.
+
+A position is a vector of cell owners (0 for an unclaimed cell, 1 or 2 for
+the player who claimed it) and a board is a 0/1 incidence matrix with a
+row for each leyline and a column for each cell, so the claim counts of a
+whole batch of positions come out of a single matrix product.
+
+random_playouts() plays a whole batch of random games in lockstep the same
+way: every game makes its next move at once, adding the claimed cells'
+columns of the incidence matrix to the mover's claim counts.
+"""
+from typing import Dict, List, Tuple
+import numpy as np
+from stonehenge_state import StonehengeState
+from stonehenge_topology import StonehengeTopology
+
+_INCIDENCE = {}
+
+
+def incidence_matrix(topology: StonehengeTopology) -> np.ndarray:
+    """
+    Return the leylines x cells 0/1 incidence matrix of topology
+
+    >>> t = StonehengeTopology(1, [['A', 'B'], ['C'], ['A'], ['B', 'C'],\
+    ['B'], ['C', 'A']])
+    >>> incidence_matrix(t).tolist()
+    [[1, 1, 0], [0, 0, 1], [1, 0, 0], [0, 1, 1], [0, 1, 0], [1, 0, 1]]
+    """
+    if topology not in _INCIDENCE:
+        matrix = np.zeros((len(topology.lines), len(topology.cells)),
+                          dtype=np.int16)
+        for k, line in enumerate(topology.lines):
+            matrix[k, list(line)] = 1
+        matrix.setflags(write=False)
+        _INCIDENCE[topology] = matrix
+    return _INCIDENCE[topology]
+
+
+def ownership_vector(state: StonehengeState) -> np.ndarray:
+    """
+    Return the owner (0, 1 or 2) of every cell of state
+    """
+    owners = np.zeros(len(state.topology.cells), dtype=np.int8)
+    lines = state.h_lines + state.r_lines + state.l_lines
+    for ley, cells in zip(lines, state.topology.lines):
+        for letter, cell in zip(ley.letters, cells):
+            if letter in ('1', '2'):
+                owners[cell] = int(letter)
+    return owners
+
+
+def line_owners(state: StonehengeState) -> np.ndarray:
+    """
+    Return the owner (0 if uncaptured, 1 or 2) of every leyline of state
+    """
+    lines = state.h_lines + state.r_lines + state.l_lines
+    return np.array([0 if type(ley.value) == int else int(ley.value)
+                     for ley in lines], dtype=np.int8)
+
+
+def leyline_features(topology: StonehengeTopology, owners: np.ndarray,
+                     captured: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Return the leyline-control features of a batch of positions on
+    topology, given their K x cells owners and K x leylines captured
+    arrays. Every feature has one row per position and one column per
+    player (p1 then p2), except contested which has a single column.
+
+    claimed: leylines captured so far
+    margin: captured leylines plus partial credit for progress on open
+            leylines the player can still take, halved on contested ones
+    needed: fewest cells the player still has to claim to win, or the
+            number of cells plus one if the player can no longer win
+    contested: open leylines both players can still take
+    """
+    matrix = incidence_matrix(topology)
+    count = owners.shape[0]
+    onehot = np.concatenate([owners == 1, owners == 2]).astype(np.int16)
+    claims = onehot @ matrix.T
+    claims = claims.reshape(2, count, -1)
+
+    length = matrix.sum(axis=1)
+    need = np.array(topology.need)
+    free = length - claims[0] - claims[1]
+    is_open = captured == 0
+    viable = is_open & (claims + free >= need)
+    contested = viable[0] & viable[1]
+
+    claimed = np.stack([(captured == 1).sum(axis=1),
+                        (captured == 2).sum(axis=1)])
+    credit = np.where(viable, claims / need, 0.0)
+    credit = np.where(contested, 0.5 * credit, credit)
+    margin = claimed + credit.sum(axis=2)
+
+    # cheapest way to capture the leylines still missing for a win
+    unreachable = len(topology.cells) + 1
+    costs = np.sort(np.where(viable, need - claims, unreachable), axis=2)
+    totals = np.minimum(np.cumsum(costs, axis=2), unreachable)
+    missing = topology.threshold - claimed
+    picked = np.take_along_axis(
+        totals, np.clip(missing - 1, 0, costs.shape[2] - 1)[..., None],
+        axis=2)[..., 0]
+    needed = np.where(missing <= 0, 0, picked)
+
+    return {'claimed': claimed.T, 'margin': margin.T, 'needed': needed.T,
+            'contested': contested.sum(axis=1)[:, None]}
+
+
+def evaluate_batch(states: List[StonehengeState]) -> np.ndarray:
+    """
+    Return a score in [-1, 1] for each of states, from the point of view
+    of the player whose turn it is in that state. Finished games score
+    exactly -1 (the player to move has lost).
+
+    Precondition: states is non-empty and all states share one board.
+    """
+    topology = states[0].topology
+    if any(s.topology is not topology for s in states):
+        raise ValueError('evaluate_batch needs states from the same board')
+    owners = np.stack([ownership_vector(s) for s in states])
+    captured = np.stack([line_owners(s) for s in states])
+    features = leyline_features(topology, owners, captured)
+
+    threshold = topology.threshold
+    margin = features['margin']
+    needed = features['needed'].astype(float)
+    race = (needed[:, 1] - needed[:, 0]) / np.maximum(needed.sum(axis=1), 1)
+    score = 0.5 * (margin[:, 0] - margin[:, 1]) / threshold + 0.5 * race
+    score = np.clip(score, -1.0, 1.0)
+    score = np.where(features['claimed'][:, 0] >= threshold, 1.0, score)
+    score = np.where(features['claimed'][:, 1] >= threshold, -1.0, score)
+
+    p1_to_move = np.array([s.p1_turn for s in states])
+    return np.where(p1_to_move, score, -score)
+
+
+def evaluate(state: StonehengeState) -> float:
+    """
+    Return a score in [-1, 1] for state from the point of view of the
+    player whose turn it is
+    """
+    return float(evaluate_batch([state])[0])
+
+
+def random_playouts(state: StonehengeState, count: int, seed: int = None) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Play count games from state with uniformly random moves and return
+    the winner (1 or 2) and the number of moves played in each. The same
+    seed gives the same games.
+
+    Claiming the free cells in a uniformly random order is the same as
+    picking a uniformly random move every turn, so each game's moves are
+    drawn up front as a random permutation of the free cells.
+
+    >>> from stonehenge import Stonehenge
+    >>> s = Stonehenge.from_length(1).current_state
+    >>> winners, lengths = random_playouts(s, 4, seed=1)
+    >>> winners.tolist(), lengths.tolist()
+    ([1, 1, 1, 1], [1, 1, 1, 1])
+    """
+    rng = np.random.default_rng(seed)
+    free = np.flatnonzero(ownership_vector(state) == 0)
+    if not state.free:
+        free = free[:0]
+    order = free[np.argsort(rng.random((count, len(free))), axis=1)]
+    return _play_orders(state, order)
+
+
+def _play_orders(state: StonehengeState, order: np.ndarray) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return random_playouts for the games from state whose players claim
+    cells in the order of the rows of order, one row per game
+    """
+    topology = state.topology
+    count = order.shape[0]
+    cell_lines = incidence_matrix(topology).T.astype(bool)
+    need = np.array(topology.need)
+    claims = np.zeros((2, count, len(need)), dtype=np.int16)
+    claims[0], claims[1] = state.p1_claims, state.p2_claims
+    captured = np.repeat(line_owners(state)[None], count, axis=0)
+    scores = np.repeat([[state.p1_score, state.p2_score]], count, axis=0)
+    winners = np.zeros(count, dtype=np.int8)
+    lengths = np.zeros(count, dtype=np.int16)
+    if max(state.p1_score, state.p2_score) >= topology.threshold:
+        winners[:] = 1 if state.p1_score >= topology.threshold else 2
+        return winners, lengths
+
+    # every game has made the same number of moves, so one player moves
+    # in all of them at once
+    player = 0 if state.p1_turn else 1
+    playing = np.ones(count, dtype=bool)
+    for turn in range(order.shape[1]):
+        lines = cell_lines[order[:, turn]] & playing[:, None]
+        claims[player] += lines
+        won = lines & (captured == 0) & (claims[player] >= need)
+        captured[won] = player + 1
+        scores[:, player] += won.sum(axis=1)
+        over = playing & (scores[:, player] >= topology.threshold)
+        winners[over] = player + 1
+        lengths[over] = turn + 1
+        playing &= ~over
+        if not playing.any():
+            break
+        player = 1 - player
+    return winners, lengths
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,101 @@
+"""
+Unittests for the vectorized Stonehenge evaluation in stonehenge_vector.py.
+"""
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from game_interface import playable_games
+from stonehenge_state_unittest import random_positions
+from stonehenge_vector import evaluate, evaluate_batch, incidence_matrix, \
+    ownership_vector, random_playouts
+
+StonehengeGame = playable_games['h']
+
+
+class StonehengeVectorUnitTests(unittest.TestCase):
+    def test_claims_from_incidence(self):
+        """
+        Test that the incidence matrix reproduces each state's claim counts.
+        """
+        for _, state in random_positions(100):
+            owners = ownership_vector(state)
+            matrix = incidence_matrix(state.topology)
+            self.assertEqual(((owners == 1) @ matrix.T).tolist(),
+                             state.p1_claims)
+            self.assertEqual(((owners == 2) @ matrix.T).tolist(),
+                             state.p2_claims)
+
+    def test_evaluate_range_and_terminal(self):
+        """
+        Test that scores lie in [-1, 1] and finished games score -1.
+        """
+        for game, state in random_positions(200, seed=2):
+            score = evaluate(state)
+            self.assertTrue(-1 <= score <= 1)
+            if game.is_over(state):
+                self.assertEqual(score, -1)
+
+    def test_batch_matches_single(self):
+        """
+        Test that evaluating a batch gives the same scores as evaluating
+        its positions one at a time.
+        """
+        states = [s for _, s in random_positions(80, seed=3)
+                  if s.b_length == 3]
+        scores = evaluate_batch(states)
+        for state, score in zip(states, scores):
+            self.assertAlmostEqual(evaluate(state), score)
+
+    def test_opening_is_even(self):
+        """
+        Test that an untouched board scores 0 for either player.
+        """
+        for length in range(1, 6):
+            for p1_starts in (True, False):
+                with patch('builtins.input', return_value=str(length)):
+                    state = StonehengeGame(p1_starts).current_state
+                self.assertEqual(evaluate(state), 0)
+
+    def test_playouts_match_make_move(self):
+        """
+        Test that random playouts of positions with few cells left end
+        with exactly the (winner, length) pairs that playing every order
+        of those cells with make_move gives.
+        """
+        def endings(game, state, moves=0):
+            if game.is_over(state):
+                return {(1 if state.p1_score >= state.topology.threshold
+                         else 2, moves)}
+            return set().union(*(endings(game, state.make_move(m),
+                                         moves + 1)
+                                 for m in state.get_possible_moves()))
+
+        checked = 0
+        for game, state in random_positions(300, seed=6):
+            if not 0 < len(state.get_possible_moves()) <= 4:
+                continue
+            checked += 1
+            winners, lengths = random_playouts(state, 400, seed=checked)
+            self.assertEqual(set(zip(winners.tolist(), lengths.tolist())),
+                             endings(game, state))
+        self.assertGreater(checked, 10)
+
+    def test_playouts_reproducible(self):
+        """
+        Test that the same seed plays the same games and that every game
+        ends within the cells left.
+        """
+        with patch('builtins.input', return_value='3'):
+            state = StonehengeGame(True).current_state
+        first = random_playouts(state, 500, seed=7)
+        second = random_playouts(state, 500, seed=7)
+        self.assertEqual(first[0].tolist(), second[0].tolist())
+        self.assertEqual(first[1].tolist(), second[1].tolist())
+        self.assertTrue(set(first[0].tolist()) <= {1, 2})
+        self.assertTrue(((first[1] >= 1) & (first[1] <= 12)).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
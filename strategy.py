@@ -8,24 +8,60 @@ and an iterative version of minimax.
 from typing import Any
 import copy
 import sys
+import threading
 sys.setrecursionlimit(1500)
 
+_NO_MOVE = object()
+
+# A minimax win n plies away scores WIN_SCORE - n; INFINITY is beyond
+# every score
+WIN_SCORE = 10000
+INFINITY = WIN_SCORE + 1
+
+# The SolvedCache the minimax strategies consult, and the positions they
+# have solved since they last wrote to it, written every FLUSH_EVERY;
+# searches in different threads share them, taking _pending_lock
+SOLVED_CACHE = None
+FLUSH_EVERY = 1000
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside a search when its stop flag is set.
+    """
+
 
 class GameTree:
     """
-    An object representing a game with its children
-    being the possible gamestates this game could go to based
-    on the possible moves
+    A frame on the explicit stack used by iterative minimax: a game,
+    the moves from it that have not been searched yet, and the best
+    score found so far among the ones that have.
+
+    Children are generated one at a time from moves, so only the frames
+    on the current path are alive at once.
 
     game: Game
+    move: the move that led to game from the frame below
     score: int
-    children: List[GameTree]
+    best_move: the move that scored score
+    moves: Iterator
+    alpha: the score the player to move is already sure of elsewhere
+    beta: the score above which the opponent avoids this position
+    floor: alpha as it was when the frame was created
     """
 
-    def __init__(self, game: Any):
-        self.children = []
-        self.score = None
+    def __init__(self, game: Any, move: Any = None, alpha: int = -INFINITY,
+                 beta: int = INFINITY):
         self.game = game
+        self.move = move
+        self.score = None
+        self.best_move = None
+        self.moves = iter(_ordered_moves(game.current_state))
+        self.alpha = alpha
+        self.beta = beta
+        self.floor = alpha
 
 
 def interactive_strategy(game: Any) -> Any:
@@ -36,94 +72,436 @@ def interactive_strategy(game: Any) -> Any:
     return game.str_to_move(move)
 
 
-def recursive_helper(game: Any) -> Any:
+def recursive_helper(game: Any, alpha: int = -INFINITY,
+                     beta: int = INFINITY, stop: Any = None) -> Any:
+    """
+    Recursively return the score of game for the player whose turn it is
+
+    A win n plies away scores WIN_SCORE - n and a loss n plies away
+    -(WIN_SCORE - n), so quicker wins and slower losses score higher.
+    The score is exact if it lies strictly between alpha and beta;
+    otherwise it is only a bound on that side, and the search stops as
+    soon as a move reaches beta (or wins at once). SearchAborted is raised
+    if stop is given and set.
     """
-    Recursively return -1 * the scores for the best possible moves
+    if stop is not None and stop.is_set():
+        raise SearchAborted()
+    score, alpha, beta = _static_score(game, game.current_state, alpha,
+                                       beta)
+    if score is not None:
+        return score
+    cached = _lookup(game.current_state)
+    if cached is not None:
+        return cached[0]
+
+    best, best_move, floor = None, None, alpha
+    for move in _ordered_moves(game.current_state):
+        score = _from_child(recursive_helper(child_game(game, move),
+                                             _to_child(beta),
+                                             _to_child(alpha), stop))
+        if best is None or score > best:
+            best, best_move = score, move
+        alpha = max(alpha, score)
+        if alpha >= beta or best == WIN_SCORE - 1:
+            break
+    if best is None:
+        best = 0
+    if _is_exact(best, floor, beta):
+        _remember(game.current_state, best, best_move)
+    return best
+
+
+def recursive_minimax(game: Any, stop: Any = None) -> Any:
+    """
+    Recursively return the best possible move for game: the quickest
+    win if there is one, otherwise the longest loss
 
+    If stop is given and set during the search, the best move found so
+    far is returned instead.
     """
-    if game.is_over(game.current_state):
-        if game.is_winner('p2') or game.is_winner('p1'):
-            return -1
-        return 0
-    else:
-        moves = game.current_state.get_possible_moves()[:]
-        games_list = []
+    cached = _lookup(game.current_state)
+    if cached is not None:
+        return cached[1]
+    moves_scores = []
+    moves = _ordered_moves(game.current_state)
+    alpha = -INFINITY
+
+    try:
         for move in moves:
-            g = copy.deepcopy(game)
-            s = g.current_state.make_move(move)
-            g.current_state = s
-            games_list.append(g)
-        return max([-1 * recursive_helper(c) for c in games_list])
+            moves_scores.append(_from_child(recursive_helper(
+                child_game(game, move), -INFINITY, _to_child(alpha), stop)))
+            alpha = max(alpha, moves_scores[-1])
+            if alpha == WIN_SCORE - 1:
+                break
+    except SearchAborted:
+        return _stopped_move(game, moves, moves_scores)
+    return _best_root_move(game, moves, moves_scores)
 
 
-def recursive_minimax(game: Any) -> Any:
+def iterative_minimax(game: Any, checkpoint: Any = None, stop: Any = None):
     """
-    Recursively return the best possible move for game
+    Return a move using the the iterative minimax strategy: the quickest
+    win if there is one, otherwise the longest loss
+
+    Given a Checkpoint, the search saves its progress to it every so
+    often, and picks up from what it saved for game's position if a
+    previous search was cut short. If stop is given and set during the
+    search, the best move found so far is returned instead.
     """
+    cached = _lookup(game.current_state)
+    if cached is not None:
+        if checkpoint is not None:
+            checkpoint.finish(cached[0], cached[1])
+        return cached[1]
     moves_scores = []
-    moves = game.current_state.get_possible_moves()
+    moves = _ordered_moves(game.current_state)
+    alpha = -INFINITY
+    stack = None
+    if checkpoint is not None:
+        saved = checkpoint.restore(game)
+        if saved is not None:
+            moves_scores = saved['scores']
+            alpha = max(moves_scores, default=-INFINITY)
+            _pending.update(saved['pending'])
+            if saved['frames']:
+                stack = _restore_stack(
+                    child_game(game, moves[len(moves_scores)]),
+                    saved['frames'])
+        checkpoint.begin(game, moves, moves_scores, _pending)
+
+    while len(moves_scores) < len(moves) and alpha != WIN_SCORE - 1:
+        child = child_game(game, moves[len(moves_scores)])
+        try:
+            if stack is None:
+                score = iterative_helper(child, -INFINITY, _to_child(alpha),
+                                         checkpoint, stop)
+            else:
+                score = _run_stack(stack, checkpoint, stop)
+        except SearchAborted:
+            return _stopped_move(game, moves, moves_scores)
+        stack = None
+        moves_scores.append(_from_child(score))
+        alpha = max(alpha, moves_scores[-1])
+
+    move = _best_root_move(game, moves, moves_scores)
+    if checkpoint is not None:
+        checkpoint.finish(max(moves_scores), move)
+    return move
+
+
+def iterative_helper(game: Any, alpha: int = -INFINITY,
+                     beta: int = INFINITY, checkpoint: Any = None,
+                     stop: Any = None) -> Any:
+    """
+    Return the score of game for the player whose turn it is, scored and
+    bounded by alpha and beta as in recursive_helper, handing the stack
+    to checkpoint's tick() as the search goes, if given, and raising
+    SearchAborted if stop is given and set
 
-    for move in moves:
-        g = copy.deepcopy(game)
-        s = g.current_state.make_move(move)
-        g.current_state = s
+    Only the current path from game is kept on the stack; each subtree
+    is dropped as soon as its score has been folded into its parent.
+    """
+    score, alpha, beta = _static_score(game, game.current_state, alpha,
+                                       beta)
+    if score is not None:
+        return score
+    cached = _lookup(game.current_state)
+    if cached is not None:
+        return cached[0]
+    return _run_stack([GameTree(game, None, alpha, beta)], checkpoint, stop)
 
-        moves_scores.append(-1*recursive_helper(g))
-    return moves[moves_scores.index(max(moves_scores))]
+
+def _run_stack(s: list, checkpoint: Any = None, stop: Any = None) -> Any:
+    """
+    Finish the search whose explicit stack of GameTree frames is s and
+    return the score of its bottom frame, or raise SearchAborted if stop
+    is given and set first
+    """
+    while True:
+        if checkpoint is not None:
+            checkpoint.tick(s)
+        if stop is not None and stop.is_set():
+            raise SearchAborted()
+        curr_game = s[-1]
+        move = _NO_MOVE
+        if curr_game.alpha < curr_game.beta \
+                and curr_game.score != WIN_SCORE - 1:
+            move = next(curr_game.moves, _NO_MOVE)
+
+        if move is _NO_MOVE:
+            s.pop()
+            if curr_game.score is None:
+                curr_game.score = 0
+            if _is_exact(curr_game.score, curr_game.floor, curr_game.beta):
+                _remember(curr_game.game.current_state, curr_game.score,
+                          curr_game.best_move)
+            if not s:
+                return curr_game.score
+            _fold_score(s[-1], _from_child(curr_game.score), curr_game.move)
+        else:
+            g = child_game(curr_game.game, move)
+            score, alpha, beta = _static_score(
+                g, g.current_state, _to_child(curr_game.beta),
+                _to_child(curr_game.alpha))
+            if score is None:
+                cached = _lookup(g.current_state)
+                if cached is None:
+                    s.append(GameTree(g, move, alpha, beta))
+                    continue
+                score = cached[0]
+            _fold_score(curr_game, _from_child(score), move)
+
+
+def _restore_stack(game: Any, frames: list) -> list:
+    """
+    Return the stack of GameTree frames described by frames, the first
+    for game and each of the others for the position its move leads to
+    from the one before
+    """
+    s = []
+    for frame in frames:
+        if s:
+            game = child_game(s[-1].game, frame['move'])
+        tree = GameTree(game, frame['move'], frame['alpha'], frame['beta'])
+        tree.score, tree.best_move = frame['score'], frame['best_move']
+        tree.floor = frame['floor']
+        tree.moves = iter(frame['moves'])
+        s.append(tree)
+    return s
+
+
+def _fold_score(frame: GameTree, score: int, move: Any) -> None:
+    """
+    Record score for frame's child reached by move if it beats frame's
+    best
+    """
+    if frame.score is None or score > frame.score:
+        frame.score = score
+        frame.best_move = move
+    frame.alpha = max(frame.alpha, score)
 
 
-def iterative_minimax(game: Any):
+def _is_exact(score: int, floor: int, beta: int) -> bool:
     """
-    Return a move using the the iterative minimax strategy
+    Return whether score, searched with alpha starting at floor, is an
+    exact value rather than a bound: it beat floor without reaching beta,
+    or is an immediate win, which nothing can beat
     """
-    moves_scores = []
-    moves = game.current_state.get_possible_moves()
+    return score == WIN_SCORE - 1 or floor < score < beta
+
 
-    for move in moves:
-        g = copy.deepcopy(game)
-        s = g.current_state.make_move(move)
-        g.current_state = s
+def _static_score(game: Any, state: Any, alpha: int, beta: int) -> tuple:
+    """
+    Return (score, alpha, beta) for a search of state within alpha and
+    beta: its score if that is known without searching, else None with
+    the window narrowed to what is known of the score
+
+    A finished game scores exactly. A decided position only bounds its
+    score: the game is sure to end within as many plies as there are
+    moves left, so a win scores between WIN_SCORE - 1 and WIN_SCORE less
+    that many. The bound settles the search only when it falls outside
+    the window, as a bound; otherwise the position is searched for its
+    real distance, within the bound.
+
+    >>> from subtract_square_game import SubtractSquareGame
+    >>> game = SubtractSquareGame.from_total(0)
+    >>> _static_score(game, game.current_state, -INFINITY, INFINITY)
+    (-10000, -10001, 10001)
+    """
+    score = state_score(game, state)
+    if score is not None:
+        return score * WIN_SCORE, alpha, beta
+    score = decided_score(state)
+    if score is None:
+        return None, alpha, beta
+    low, high = WIN_SCORE - len(state.get_possible_moves()), WIN_SCORE - 1
+    if score < 0:
+        low, high = -high, -low
+    if low >= beta:
+        return low, alpha, beta
+    if high <= alpha:
+        return high, alpha, beta
+    return None, max(alpha, low - 1), min(beta, high + 1)
+
+
+def _from_child(score: int) -> int:
+    """
+    Return score, a child's score for the player to move there, as the
+    score of moving to that child, one ply further from the end
+
+    >>> _from_child(-WIN_SCORE), _from_child(WIN_SCORE - 4), _from_child(0)
+    (9999, -9995, 0)
+    """
+    score = -score
+    if score > 0:
+        return score - 1
+    if score < 0:
+        return score + 1
+    return 0
+
+
+def _to_child(bound: int) -> int:
+    """
+    Return the bound on a child's score matching bound on the score of
+    moving to it, so that _from_child(score) passes bound exactly when
+    score passes _to_child(bound)
+
+    >>> _to_child(9995), _to_child(-9995), _to_child(0)
+    (-9996, 9996, 0)
+    """
+    if bound > 0:
+        return -(bound + 1)
+    if bound < 0:
+        return -(bound - 1)
+    return 0
 
-        moves_scores.append(-1*iterative_helper(g))
 
+def _ordered_moves(state: Any) -> list:
+    """
+    Return the moves of state a search needs to try, moves that win at
+    once first
+    """
+    moves = state.search_moves()
+    if hasattr(state, 'winning_moves'):
+        wins = state.winning_moves(state.get_current_player_name())
+        if wins:
+            moves = wins + [m for m in moves if m not in wins]
+    return moves
+
+
+def _best_root_move(game: Any, moves: list, moves_scores: list) -> Any:
+    """
+    Return the move of moves with the best score in moves_scores,
+    recording it and every position solved along the way in SOLVED_CACHE
+
+    moves_scores may stop short of moves when the search ended early, and
+    only its best score need be exact: the first move to reach it is
+    chosen.
+    """
+    best = moves_scores.index(max(moves_scores))
+    _remember(game.current_state, moves_scores[best], moves[best])
+    _flush()
+    return moves[best]
+
+
+def _stopped_move(game: Any, moves: list, moves_scores: list) -> Any:
+    """
+    Return the move of moves with the best score in moves_scores, the
+    scores of a search stopped early, or rough_outcome_strategy's move if
+    there are none
+
+    Unlike _best_root_move, nothing is recorded for game's position, whose
+    score is unknown, though the positions solved along the way are
+    written out.
+    """
+    _flush()
+    if not moves_scores:
+        return rough_outcome_strategy(game)
     return moves[moves_scores.index(max(moves_scores))]
 
 
-def iterative_helper(game: Any) -> Any:
+def use_solved_cache(cache: Any) -> None:
+    """
+    Make the minimax strategies look positions up in cache, a
+    SolvedCache, and write the positions they solve back to it. Pass
+    None to stop using a cache.
     """
-    Return the scores of the states reachable from game
+    global SOLVED_CACHE
+    with _pending_lock:
+        SOLVED_CACHE = cache
+        _pending.clear()
+
 
+def _lookup(state: Any) -> Any:
     """
-    s = []
-    gt = GameTree(game)
-    s.append(gt)
+    Return (score, best move) for state from SOLVED_CACHE, or None if
+    there is no cache or it has not solved state
+    """
+    cache = SOLVED_CACHE
+    if cache is None:
+        return None
+    key = state.key()
+    with _pending_lock:
+        if key in _pending:
+            return _pending[key]
+    return cache.get(key)
 
-    while gt.score is None:
-        curr_game = s[len(s)-1]
 
-        if curr_game.game.is_over(curr_game.game.current_state):
-            if curr_game.game.is_winner('p2') or curr_game.game.is_winner('p1'):
-                curr_game.score = -1
-            else:
-                curr_game.score = 0
-            s.pop()
+def _remember(state: Any, score: int, move: Any) -> None:
+    """
+    Queue state's score and best move for writing to SOLVED_CACHE
+    """
+    if SOLVED_CACHE is not None:
+        with _pending_lock:
+            _pending[state.key()] = (score, move)
+            full = len(_pending) >= FLUSH_EVERY
+        if full:
+            _flush()
 
-        elif curr_game.children == []:
-            moves = curr_game.game.current_state.get_possible_moves()[:]
-            s.append(curr_game)
-            for move in moves:
-                g = copy.deepcopy(curr_game.game)
-                s1 = g.current_state.make_move(move)
-                g.current_state = s1
-                gt1 = GameTree(g)
-                curr_game.children.append(gt1)
-                s.append(gt1)
 
-        else:
-            curr_game.score = max([-1*g.score for g in curr_game.children])
-            s.pop()
+def _flush() -> None:
+    """
+    Write the positions solved since the last write to SOLVED_CACHE
+    """
+    with _pending_lock:
+        if SOLVED_CACHE is not None:
+            SOLVED_CACHE.put_many((key, value, move) for key, (value, move)
+                                  in _pending.items())
+        _pending.clear()
+
+
+def child_game(game: Any, move: Any) -> Any:
+    """
+    Return a copy of game whose current state is the result of applying
+    move to game's current state.
+
+    make_move never mutates the state it is called on, so the copy can
+    share everything else with game.
+    """
+    g = copy.copy(game)
+    g.current_state = game.current_state.make_move(move)
+    return g
+
 
-    return gt.score
+def terminal_score(game: Any) -> Any:
+    """
+    Return the score of game for the player whose turn it is if game is
+    over, or None if it is not
+    """
+    if not game.is_over(game.current_state):
+        return None
+    if game.is_winner('p2') or game.is_winner('p1'):
+        return -1
+    return 0
+
+
+def state_score(game: Any, state: Any) -> Any:
+    """
+    Return the score of state for the player whose turn it is if game is
+    over at state, or None if it is not
+    """
+    if not game.is_over(state):
+        return None
+    if game.current_state is not state:
+        game = copy.copy(game)
+        game.current_state = state
+    return terminal_score(game)
+
+
+def decided_score(state: Any) -> Any:
+    """
+    Return 1 if the player to move at state is certain to win, -1 if
+    certain to lose, or None if the game is still open or state cannot
+    tell (states without a decided() method)
+    """
+    if not hasattr(state, 'decided'):
+        return None
+    winner = state.decided()
+    if winner is None:
+        return None
+    if winner == state.get_current_player_name():
+        return 1
+    return -1
 
 
 def rough_outcome_strategy(game: Any) -> Any:
@@ -0,0 +1,678 @@
+"""
+Unittests for the search engines in strategy.py and the modules built on
+top of it.
+"""
+import contextlib
+import copy
+import io
+import os
+import random
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from checkpoint import Checkpoint
+from game_interface import GameInterface, make_strategy, playable_games
+from lazy_smp import LazySMPStrategy
+from move_ordering import MoveOrderer
+from pn_search import PNSearchStrategy, ProofNumberSearch
+from pondering import PonderingStrategy
+from pvs import MTDSearch, PVSearch, PVSStrategy
+from search import WIN, AlphaBeta, is_proven
+from solved_cache import SolvedCache
+import solve
+from state_graph import StateGraph
+import strategy
+from strategy import child_game, iterative_helper, recursive_helper
+
+StonehengeGame = playable_games['h']
+SubtractSquareGame = playable_games['s']
+
+
+def make_game(game_class, value: str, p1_starts: bool = True):
+    """
+    Return a new game_class, answering its input() prompt with value.
+    """
+    with patch('builtins.input', return_value=value):
+        return game_class(p1_starts)
+
+
+def outcome(score):
+    """
+    Return 1, 0 or -1 as a minimax score is a win, draw or loss.
+    """
+    return (score > 0) - (score < 0)
+
+
+def exact_score(game, state, scores, move=None):
+    """
+    Return the minimax score of state, or of playing move there, found
+    by searching every move to the end, remembering scores by key().
+    """
+    if move is not None:
+        score = -exact_score(game, state.make_move(move), scores)
+        return score - outcome(score)
+    if state.key() not in scores:
+        if game.is_over(state):
+            scores[state.key()] = -strategy.WIN_SCORE
+        else:
+            scores[state.key()] = max(
+                exact_score(game, state, scores, m)
+                for m in state.get_possible_moves())
+    return scores[state.key()]
+
+
+def play(game, moves):
+    """
+    Apply each move in moves to game's current state.
+    """
+    for move in moves:
+        game.current_state = game.current_state.make_move(
+            game.str_to_move(move))
+    return game
+
+
+class IterativeMinimaxUnitTests(unittest.TestCase):
+    def test_helpers_agree_subtract_square(self):
+        """
+        Test that the iterative and recursive helpers score every small
+        SubtractSquare game the same way.
+        """
+        for total in range(1, 20):
+            game = make_game(SubtractSquareGame, str(total))
+            self.assertEqual(iterative_helper(game), recursive_helper(game),
+                             "Helpers disagree on a total of {}".format(total))
+
+    def test_helpers_agree_stonehenge(self):
+        """
+        Test that the iterative and recursive helpers agree on a
+        length-2 Stonehenge position.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F'])
+        self.assertEqual(iterative_helper(game), recursive_helper(game))
+
+    def test_dead_cells_do_not_change_results(self):
+        """
+        Test that searching one dead cell for all of them gives the same
+        results as searching every move.
+        """
+        def full_search(game):
+            score = strategy.terminal_score(game)
+            if score is not None:
+                return score
+            return max(-full_search(child_game(game, m))
+                       for m in game.current_state.get_possible_moves())
+
+        rng = random.Random(4)
+        for _ in range(20):
+            game = make_game(StonehengeGame, '3')
+            for _ in range(6):
+                moves = game.current_state.get_possible_moves()
+                if game.is_over(game.current_state):
+                    break
+                play(game, [rng.choice(moves)])
+            if not game.is_over(game.current_state):
+                self.assertEqual(outcome(iterative_helper(game)),
+                                 full_search(game))
+
+    def test_decided_positions_keep_exact_distances(self):
+        """
+        Test that positions whose winner is decided early still get the
+        exact distance to the end: minimax plays the quickest win, and
+        every score it caches is exact.
+        """
+        scores = {}
+        directory = tempfile.TemporaryDirectory()
+        rng = random.Random(9)
+        try:
+            for i in range(60):
+                game = make_game(StonehengeGame, '2', i % 2 == 0)
+                for _ in range(rng.randint(0, 3)):
+                    play(game, [rng.choice(
+                        game.current_state.get_possible_moves())])
+                if game.is_over(game.current_state):
+                    continue
+                cache = SolvedCache(os.path.join(directory.name,
+                                                 '{}.db'.format(i)))
+                strategy.use_solved_cache(cache)
+                state = game.current_state
+                move = strategy.iterative_minimax(game)
+                self.assertEqual(exact_score(game, state, scores, move),
+                                 exact_score(game, state, scores))
+                for key in scores:
+                    if cache.get(key) is not None:
+                        self.assertEqual(cache.get(key)[0], scores[key])
+                strategy.use_solved_cache(None)
+                cache.close()
+        finally:
+            strategy.use_solved_cache(None)
+            directory.cleanup()
+
+    def test_quickest_win_and_longest_loss(self):
+        """
+        Test that scores count the plies to the end of the game and that
+        minimax plays the quickest win and puts off a loss.
+        """
+        game = make_game(SubtractSquareGame, '4')
+        self.assertEqual(recursive_helper(game), strategy.WIN_SCORE - 1)
+        self.assertEqual(strategy.recursive_minimax(game), 4)
+        # from 11, 1 and 4 win in five plies but 9 wins in three
+        game = make_game(SubtractSquareGame, '11')
+        self.assertEqual(iterative_helper(game), strategy.WIN_SCORE - 3)
+        self.assertEqual(strategy.recursive_minimax(game), 9)
+        self.assertEqual(strategy.iterative_minimax(game), 9)
+        # from 10, 1 and 9 lose in two plies but 4 holds out for four
+        game = make_game(SubtractSquareGame, '10')
+        self.assertEqual(recursive_helper(game), -(strategy.WIN_SCORE - 4))
+        self.assertEqual(strategy.recursive_minimax(game), 4)
+        self.assertEqual(strategy.iterative_minimax(game), 4)
+
+
+class MoveOrderingUnitTests(unittest.TestCase):
+    def test_winning_move_first(self):
+        """
+        Test that a move which wins immediately is ordered first.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A', 'B'])
+        ordered = MoveOrderer().order(game.current_state)
+        self.assertEqual(ordered[0], 'G')
+        self.assertEqual(sorted(ordered),
+                         game.current_state.get_possible_moves())
+
+    def test_killer_promoted(self):
+        """
+        Test that a move recorded as a cutoff is tried before quiet moves
+        at the same ply, for games without leyline scores too.
+        """
+        game = make_game(SubtractSquareGame, '20')
+        orderer = MoveOrderer()
+        self.assertEqual(orderer.order(game.current_state, ply=3),
+                         [1, 4, 9, 16])
+        orderer.record_cutoff(game.current_state, 9, 3, 2)
+        self.assertEqual(orderer.order(game.current_state, ply=3)[0], 9)
+        self.assertEqual(orderer.order(game.current_state, ply=1)[0], 9)
+        orderer.clear()
+        self.assertEqual(orderer.order(game.current_state, ply=3)[0], 1)
+
+
+class ProofNumberSearchUnitTests(unittest.TestCase):
+    def test_matches_minimax_subtract_square(self):
+        """
+        Test that proof-number search decides small SubtractSquare games
+        the way minimax does, and that its proving moves win.
+        """
+        for total in range(1, 30):
+            game = make_game(SubtractSquareGame, str(total))
+            result = ProofNumberSearch(game).solve(game.current_state)
+            self.assertEqual(result.value, outcome(iterative_helper(game)))
+            if result.value == 1:
+                self.assertLess(
+                    iterative_helper(child_game(game, result.move)), 0)
+
+    def test_matches_minimax_stonehenge(self):
+        """
+        Test that proof-number search decides length-2 Stonehenge
+        positions the way minimax does.
+        """
+        for moves in [[], ['A'], ['B'], ['A', 'F'], ['D', 'A']]:
+            game = play(make_game(StonehengeGame, '2'), moves)
+            result = ProofNumberSearch(game).solve(game.current_state)
+            self.assertEqual(result.value, outcome(iterative_helper(game)))
+
+    def test_unresolved_when_out_of_budget(self):
+        """
+        Test that a search that runs out of nodes reports no result.
+        """
+        game = make_game(StonehengeGame, '3')
+        result = ProofNumberSearch(game, max_nodes=50).solve(
+            game.current_state)
+        self.assertIsNone(result.value)
+        self.assertIsNone(result.move)
+
+    def test_tree_reused_two_plies_on(self):
+        """
+        Test that a search two plies below the last root carries on from
+        the old tree, counts it against its size limit and still reaches
+        the right answer.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A'])
+        search = ProofNumberSearch(game, max_nodes=8)
+        self.assertIsNone(search.solve(game.current_state).value)
+
+        reused = 0
+        for first in game.current_state.get_possible_moves():
+            child = game.current_state.make_move(first)
+            for reply in child.get_possible_moves():
+                trial = copy.deepcopy(search)
+                trial.max_nodes = 1000
+                grandchild = child.make_move(reply)
+                result = trial.solve(grandchild)
+                if trial.reused:
+                    reused += 1
+                    later = play(copy.copy(game), [first, reply])
+                    self.assertEqual(result.value,
+                                     outcome(iterative_helper(later)))
+                    self.assertLessEqual(result.nodes, 1000)
+        self.assertGreater(reused, 0)
+        search.solve(play(make_game(StonehengeGame, '2'), ['B'])
+                     .current_state)
+        self.assertFalse(search.reused)
+
+    def test_one_search_per_player(self):
+        """
+        Test that each player of a game gets a search of their own, which
+        carries on from its tree at that player's next move.
+        """
+        players = [make_strategy('pn'), make_strategy('pn')]
+        self.assertIsInstance(players[0], PNSearchStrategy)
+        self.assertIsNot(players[0], players[1])
+        game = make_game(StonehengeGame, '3')
+        reused = []
+        for turn in range(4):
+            player = players[turn % 2]
+            player.max_nodes = 200
+            play(game, [player(game)])
+            reused.append(player.search.reused)
+        self.assertIsNot(players[0].search, players[1].search)
+        self.assertEqual(reused, [False, False, True, True])
+
+    def test_table_capped(self):
+        """
+        Test that the transposition table never holds more positions than
+        its cap, and that the search is still right.
+        """
+        game = make_game(StonehengeGame, '2')
+        search = ProofNumberSearch(game, max_table=20)
+        result = search.solve(game.current_state)
+        self.assertEqual(result.value, outcome(iterative_helper(game)))
+        self.assertLessEqual(len(search.table), 20)
+
+
+class AlphaBetaUnitTests(unittest.TestCase):
+    def test_matches_minimax_subtract_square(self):
+        """
+        Test that a full alpha-beta search decides small SubtractSquare
+        games the way minimax does.
+        """
+        for total in range(1, 30):
+            game = make_game(SubtractSquareGame, str(total))
+            engine = AlphaBeta(game)
+            value = list(engine.iterate(game.current_state))[-1][1]
+            self.assertTrue(is_proven(value))
+            self.assertEqual(value > 0, iterative_helper(game) > 0)
+
+    def test_matches_minimax_stonehenge(self):
+        """
+        Test that alpha-beta decides length-2 Stonehenge positions the way
+        minimax does, and finds the winning move of a won position.
+        """
+        for moves in [[], ['A'], ['B'], ['A', 'F'], ['D', 'A']]:
+            game = play(make_game(StonehengeGame, '2'), moves)
+            value = list(AlphaBeta(game).iterate(game.current_state))[-1][1]
+            self.assertEqual(value > 0, iterative_helper(game) > 0)
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F', 'D'])
+        engine = AlphaBeta(game)
+        depth, value, move = list(engine.iterate(game.current_state))[-1]
+        self.assertEqual((value, move), (WIN - depth, 'E'))
+
+    def test_decided_positions_keep_exact_distances(self):
+        """
+        Test that a full search scores positions whose winner is decided
+        early by their real distance to the end.
+        """
+        scores = {}
+        rng = random.Random(10)
+        for i in range(40):
+            game = make_game(StonehengeGame, '2', i % 2 == 0)
+            for _ in range(rng.randint(1, 4)):
+                if not game.is_over(game.current_state):
+                    play(game, [rng.choice(
+                        game.current_state.get_possible_moves())])
+            if game.is_over(game.current_state):
+                continue
+            value = 0
+            for _, value, _ in AlphaBeta(game).iterate(game.current_state):
+                pass
+            self.assertTrue(is_proven(value))
+            expected = exact_score(game, game.current_state, scores)
+            self.assertEqual(outcome(value) * (WIN - abs(value)),
+                             outcome(expected)
+                             * (strategy.WIN_SCORE - abs(expected)))
+
+
+class StateGraphUnitTests(unittest.TestCase):
+    def test_matches_minimax_subtract_square(self):
+        """
+        Test that solving the state graph gives minimax's exact scores on
+        small SubtractSquare games.
+        """
+        for total in range(1, 30):
+            game = make_game(SubtractSquareGame, str(total))
+            graph = StateGraph(game)
+            self.assertEqual(graph.solve(), recursive_helper(game))
+            move = graph.best_move(game.current_state)
+            score = -graph.value(game.current_state.make_move(move))
+            self.assertEqual(score - outcome(score), graph.values[0])
+
+    def test_matches_minimax_stonehenge(self):
+        """
+        Test that solving the state graph gives minimax's exact scores on
+        length-2 Stonehenge positions.
+        """
+        for moves in [[], ['A'], ['A', 'F'], ['D', 'A']]:
+            game = play(make_game(StonehengeGame, '2'), moves)
+            self.assertEqual(StateGraph(game).solve(),
+                             recursive_helper(game))
+
+    def test_graph_shape(self):
+        """
+        Test that every position appears once, with one edge per move, and
+        that each node comes after its successors in order.
+        """
+        game = make_game(StonehengeGame, '2')
+        graph = StateGraph(game)
+        self.assertEqual(len(set(graph.keys)), graph.node_count)
+        self.assertEqual(sorted(graph.order.tolist()),
+                         list(range(graph.node_count)))
+        self.assertEqual(graph.offsets[-1], graph.edge_count)
+        self.assertEqual(len(graph.moves), graph.edge_count)
+        self.assertEqual(graph.moves[graph.offsets[0]:graph.offsets[1]],
+                         game.current_state.get_possible_moves())
+        position = {node: i for i, node in enumerate(graph.order.tolist())}
+        for node in range(graph.node_count):
+            for edge in range(graph.offsets[node], graph.offsets[node + 1]):
+                self.assertLess(position[graph.targets[edge]],
+                                position[node])
+
+
+class PVSUnitTests(unittest.TestCase):
+    def test_matches_alphabeta(self):
+        """
+        Test that PVS and MTD(f) find alpha-beta's exact values on small
+        SubtractSquare and Stonehenge games.
+        """
+        games = [make_game(SubtractSquareGame, str(total))
+                 for total in range(1, 30)]
+        games += [play(make_game(StonehengeGame, '2'), moves)
+                  for moves in [[], ['A'], ['B'], ['A', 'F'], ['D', 'A']]]
+        for game in games:
+            expected = list(AlphaBeta(game).iterate(game.current_state))
+            for engine in (PVSearch(game), MTDSearch(game)):
+                found = list(engine.iterate(game.current_state))
+                self.assertEqual(found[-1][:2], expected[-1][:2])
+                self.assertIn(found[-1][2],
+                              game.current_state.get_possible_moves())
+
+    def test_principal_variation(self):
+        """
+        Test that the strategy's principal variation starts with its move
+        and is a legal line of play.
+        """
+        for mtdf in (False, True):
+            game = play(make_game(StonehengeGame, '2'), ['A', 'F', 'D'])
+            searcher = PVSStrategy(mtdf=mtdf)
+            move, value, pv = searcher.analyse(game)
+            self.assertEqual((move, value),
+                             ('E', WIN - searcher.last_stats['depth']))
+            self.assertEqual(pv[0], move)
+            self.assertEqual(searcher(game), move)
+            state = game.current_state
+            for step in searcher.last_pv:
+                self.assertIn(step, state.get_possible_moves())
+                state = state.make_move(step)
+
+
+class LazySMPUnitTests(unittest.TestCase):
+    def test_finds_winning_move(self):
+        """
+        Test that two workers sharing a table find the only winning move.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F', 'D'])
+        smp = LazySMPStrategy(workers=2, time_limit=60, table_size=1 << 12)
+        self.assertEqual(smp(game), 'E')
+        self.assertTrue(is_proven(smp.last_stats['value']))
+
+
+class PonderingUnitTests(unittest.TestCase):
+    def test_reply_found_in_table(self):
+        """
+        Test that after pondering the opponent's turn, the position after
+        their best reply is answered mostly from the table.
+        """
+        game = make_game(StonehengeGame, '2')
+        engine = PonderingStrategy()
+        move = engine(game)
+        self.assertTrue(engine.wait(60))
+        self.assertGreater(engine.last_stats['nodes'], 10)
+        play(game, [move])
+        play(game, [AlphaBeta(game, engine.table).best_move(
+            game.current_state)])
+        fresh = AlphaBeta(game)
+        list(fresh.iterate(game.current_state))
+        engine(game)
+        engine.stop_pondering()
+        self.assertLess(engine.last_stats['nodes'] * 4, fresh.nodes)
+        self.assertGreater(engine.last_stats['pondered'], 0)
+
+    def test_one_engine_per_player_stopped_at_game_over(self):
+        """
+        Test that each player of a game gets a pondering engine of their
+        own, and that neither is still pondering once the game is over.
+        """
+        first, second = make_strategy('ponder'), make_strategy('ponder')
+        self.assertIsInstance(first, PonderingStrategy)
+        self.assertIsNot(first, second)
+        first.time_limit = second.time_limit = 0.05
+        threads = threading.active_count()
+        with patch('builtins.input', side_effect=['y', '3']):
+            interface = GameInterface(StonehengeGame, first, second)
+        with patch('sys.stdout', new_callable=io.StringIO):
+            interface.play()
+        self.assertTrue(interface.game.is_over(
+            interface.game.current_state))
+        self.assertEqual(threading.active_count(), threads)
+
+
+class SolvedCacheUnitTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'solved.db')
+
+    def tearDown(self):
+        strategy.use_solved_cache(None)
+        self.directory.cleanup()
+
+    def test_round_trip_and_cap(self):
+        """
+        Test that entries survive reopening and the oldest are evicted
+        past the cap.
+        """
+        cache = SolvedCache(self.path, max_entries=3)
+        cache.put_many([('a', 1, 'A'), ('b', -1, None), ('c', 0, 4)])
+        cache.put('d', 1, 'D')
+        cache.close()
+
+        cache = SolvedCache(self.path, max_entries=3)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), (-1, None))
+        self.assertEqual(cache.get('c'), (0, 4))
+        self.assertEqual(cache.get('d'), (1, 'D'))
+        cache.close()
+
+    def test_minimax_fills_and_reuses_cache(self):
+        """
+        Test that minimax writes solved positions back and a later run
+        answers from them without searching.
+        """
+        cache = SolvedCache(self.path)
+        strategy.use_solved_cache(cache)
+        game = play(make_game(StonehengeGame, '2'), ['A', 'F', 'D'])
+        move = strategy.iterative_minimax(game)
+        self.assertEqual(move, 'E')
+        self.assertGreater(len(cache), 1)
+        self.assertEqual(cache.get(game.current_state.key()),
+                         (strategy.WIN_SCORE - 3, 'E'))
+
+        with patch('strategy.child_game') as child:
+            self.assertEqual(strategy.recursive_minimax(game), 'E')
+            self.assertFalse(child.called)
+
+    def test_solved_positions_written_in_batches(self):
+        """
+        Test that minimax writes solved positions as it goes, never
+        holding more than FLUSH_EVERY of them, and finds the same move.
+        """
+        game = make_game(StonehengeGame, '2')
+        expected = strategy.iterative_minimax(game)
+        cache = SolvedCache(self.path)
+        strategy.use_solved_cache(cache)
+        batches = []
+        put_many = cache.put_many
+
+        def record(entries):
+            entries = list(entries)
+            batches.append(len(entries))
+            put_many(entries)
+
+        cache.put_many = record
+        with patch('strategy.FLUSH_EVERY', 10):
+            self.assertEqual(strategy.iterative_minimax(game), expected)
+        self.assertGreater(len(batches), 2)
+        self.assertLessEqual(max(batches), 10)
+        self.assertEqual(len(cache), sum(batches))
+        cache.close()
+
+    def test_cache_shared_between_threads(self):
+        """
+        Test that a cache opened in one thread can be used by searches in
+        another, at the same time as in the first.
+        """
+        first = play(make_game(StonehengeGame, '2'), ['A'])
+        second = play(make_game(StonehengeGame, '2'), ['B'])
+        expected = [strategy.iterative_minimax(first),
+                    strategy.iterative_minimax(second)]
+        cache = SolvedCache(self.path)
+        strategy.use_solved_cache(cache)
+        moves, errors = [], []
+
+        def solve():
+            try:
+                moves.append(strategy.iterative_minimax(second))
+            except Exception as error:
+                errors.append(error)
+
+        with patch('strategy.FLUSH_EVERY', 10):
+            thread = threading.Thread(target=solve)
+            thread.start()
+            moves.insert(0, strategy.recursive_minimax(first))
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(moves, expected)
+        self.assertIsNotNone(cache.get(second.current_state.key()))
+        self.assertEqual(cache.get(first.current_state.key())[1],
+                         expected[0])
+        cache.close()
+
+
+class KilledCheckpoint(Checkpoint):
+    """
+    A checkpoint that saves on every tick and kills the search after a
+    number of saves, counting the ticks it sees.
+    """
+
+    def __init__(self, path, kill_after=None):
+        super().__init__(path, 0.0)
+        self.kill_after = kill_after
+        self.ticks = 0
+
+    def tick(self, stack):
+        self.ticks += 1
+        super().tick(stack)
+        if self.saves == self.kill_after:
+            raise KeyboardInterrupt
+
+
+class CheckpointUnitTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'solve.ckpt')
+
+    def tearDown(self):
+        strategy.use_solved_cache(None)
+        self.directory.cleanup()
+
+    def test_resume_after_kill(self):
+        """
+        Test that a search killed partway picks up from its last save,
+        finishing with fewer steps and the same move as a search that
+        was never stopped.
+        """
+        game = make_game(StonehengeGame, '2')
+        full = KilledCheckpoint(self.path)
+        expected = strategy.iterative_minimax(game, full)
+        self.assertFalse(os.path.exists(self.path))
+
+        cache_path = os.path.join(self.directory.name, 'solved.db')
+        cache = SolvedCache(cache_path)
+        strategy.use_solved_cache(cache)
+        killed = KilledCheckpoint(self.path, kill_after=full.ticks // 2)
+        with self.assertRaises(KeyboardInterrupt):
+            strategy.iterative_minimax(game, killed)
+        cache.close()
+        self.assertTrue(os.path.exists(self.path))
+
+        cache = SolvedCache(cache_path)
+        strategy.use_solved_cache(cache)
+        resumed = KilledCheckpoint(self.path)
+        self.assertEqual(strategy.iterative_minimax(game, resumed), expected)
+        self.assertEqual(resumed.result, full.result)
+        self.assertLess(resumed.ticks, full.ticks * 2 // 3)
+        self.assertGreater(len(cache), 1)
+        self.assertFalse(os.path.exists(self.path))
+        cache.close()
+
+    def test_cached_root_finishes_checkpoint(self):
+        """
+        Test that a search answered from the SolvedCache still records its
+        result and removes a checkpoint left for the position, and that
+        solve.py can be run again on a solved position.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A'])
+        with self.assertRaises(KeyboardInterrupt):
+            strategy.iterative_minimax(game,
+                                       KilledCheckpoint(self.path, 1))
+        cache = SolvedCache(os.path.join(self.directory.name, 'solved.db'))
+        strategy.use_solved_cache(cache)
+        move = strategy.iterative_minimax(game)
+        checkpoint = Checkpoint(self.path)
+        self.assertEqual(strategy.iterative_minimax(game, checkpoint), move)
+        self.assertEqual(checkpoint.result,
+                         cache.get(game.current_state.key()))
+        self.assertFalse(os.path.exists(self.path))
+        strategy.use_solved_cache(None)
+        cache.close()
+
+        args = ['2', 'A', '--checkpoint', self.path, '--cache',
+                os.path.join(self.directory.name, 'cli.db')]
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            solve.main(args)
+            solve.main(args + ['--resume'])
+        self.assertEqual(output.getvalue().count('Best move ' + move), 2)
+
+    def test_other_position_ignores_checkpoint(self):
+        """
+        Test that a checkpoint saved for one position is not resumed for
+        another.
+        """
+        game = play(make_game(StonehengeGame, '2'), ['A'])
+        with self.assertRaises(KeyboardInterrupt):
+            strategy.iterative_minimax(game,
+                                       KilledCheckpoint(self.path, 1))
+        other = play(make_game(StonehengeGame, '2'), ['B'])
+        self.assertIsNone(Checkpoint(self.path).restore(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,6 +23,22 @@ class SubtractSquareGame(Game):
         count = int(input("Enter the number to subtract from: "))
         self.current_state = SubtractSquareState(p1_starts, count)
 
+    @classmethod
+    def from_total(cls, count, p1_starts=True):
+        """
+        Return a new game starting from count, without asking for it.
+
+        :param count: The number to subtract from.
+        :type count: int
+        :param p1_starts: Whether Player 1 moves first.
+        :type p1_starts: bool
+        :return: The new game.
+        :rtype: SubtractSquareGame
+        """
+        game = cls.__new__(cls)
+        game.current_state = SubtractSquareState(p1_starts, count)
+        return game
+
     def get_instructions(self):
         """
         Return the instructions for this Game.
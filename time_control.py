@@ -0,0 +1,251 @@
+"""
+Chess-style clocks for GameInterface.
+
+Each player starts with a total number of seconds and gains an increment
+after every move. A strategy whose signature has a time_budget parameter is
+told how many seconds it should spend on the move; every strategy is cut
+off once its clock runs out, and then either loses on time or has its move
+chosen by rough_outcome_strategy instead.
+
+A strategy cut off is also stopped, so it doesn't go on searching in the
+background. One whose signature has a stop parameter runs in a thread and
+is handed a threading.Event, set when its time is up, which it must check
+as it searches and return soon after. Any other strategy runs in a child
+process that is terminated when its time is up, or, if it or the game
+cannot be pickled for one, in a thread that is left to finish on its own.
+interactive_strategy always runs in a thread, since a child process has
+no keyboard to read from.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import copy
+import inspect
+import multiprocessing
+import pickle
+import threading
+import time
+from strategy import interactive_strategy, rough_outcome_strategy
+
+FALLBACK = 'fallback'
+FORFEIT = 'forfeit'
+
+
+class TimeOut(Exception):
+    """
+    Raised when a player under a FORFEIT time control runs out of time.
+    """
+
+
+def accepts_budget(strategy: Callable) -> bool:
+    """
+    Return whether strategy can be called with a time_budget keyword
+
+    >>> accepts_budget(rough_outcome_strategy)
+    False
+    >>> accepts_budget(lambda game, time_budget=None: None)
+    True
+    """
+    return _accepts(strategy, 'time_budget')
+
+
+def accepts_stop(strategy: Callable) -> bool:
+    """
+    Return whether strategy can be called with a stop keyword
+
+    >>> accepts_stop(rough_outcome_strategy)
+    False
+    >>> accepts_stop(lambda game, stop=None: None)
+    True
+    """
+    return _accepts(strategy, 'stop')
+
+
+def _accepts(strategy: Callable, keyword: str) -> bool:
+    """
+    Return whether strategy can be called with keyword
+    """
+    try:
+        parameters = inspect.signature(strategy).parameters
+    except (TypeError, ValueError):
+        return False
+    return keyword in parameters or any(
+        p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+
+
+def _picklable(*objects: Any) -> bool:
+    """
+    Return whether objects can be pickled for a child process
+    """
+    try:
+        pickle.dumps(objects)
+    except Exception:  # pickling raises all sorts
+        return False
+    return True
+
+
+def _call(strategy: Callable, game: Any, kwargs: dict,
+          outcome: list) -> None:
+    """
+    Append ('move', move) for the move strategy picks for game to
+    outcome, or ('error', exception) if it raises one
+    """
+    try:
+        outcome.append(('move', strategy(game, **kwargs)))
+    except Exception as error:  # re-raised in the caller
+        outcome.append(('error', error))
+
+
+def _call_in_child(strategy: Callable, game: Any, kwargs: dict,
+                   connection: Any) -> None:
+    """
+    Send what _call finds for strategy and game down connection
+    """
+    outcome = []
+    _call(strategy, game, kwargs, outcome)
+    try:
+        connection.send(outcome[0])
+    except Exception as error:  # an unpicklable move or exception
+        connection.send(('error', RuntimeError(repr(error))))
+    connection.close()
+
+
+class TimeControl:
+    """
+    The clocks of both players in one game.
+
+    total: the seconds each player starts with
+    increment: the seconds added to a player's clock after each move
+    on_timeout: FALLBACK to play rough_outcome_strategy's move for a player
+                who runs out of time (their clock then restarts from the
+                increment alone), or FORFEIT to have them lose the game
+    remaining: the seconds left on each player's clock, by player name
+    move_times: (player, move, seconds) for every move chosen so far
+    """
+    total: float
+    increment: float
+    on_timeout: str
+    remaining: Dict[str, float]
+    move_times: List[Tuple[str, Any, float]]
+
+    def __init__(self, total: float, increment: float = 0.0,
+                 on_timeout: str = FALLBACK) -> None:
+        """
+        Initialize clocks of total seconds each, gaining increment seconds
+        per move
+        """
+        if on_timeout not in (FALLBACK, FORFEIT):
+            raise ValueError('on_timeout must be {!r} or {!r}'.format(
+                FALLBACK, FORFEIT))
+        self.total = total
+        self.increment = increment
+        self.on_timeout = on_timeout
+        self.remaining = {'p1': total, 'p2': total}
+        self.move_times = []
+
+    def budget(self, player: str, state: Any) -> float:
+        """
+        Return the seconds player should spend on a move from state: an
+        even share of their clock over the moves they have left to make,
+        plus the increment, and never all of what remains
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> TimeControl(10.0, 1.0).budget('p1', SubtractSquareState(True, 9))
+        6.0
+        """
+        moves_left = max(1, (len(state.get_possible_moves()) + 1) // 2)
+        share = self.remaining[player] / moves_left + self.increment
+        return min(share, 0.9 * self.remaining[player])
+
+    def choose(self, strategy: Callable, game: Any) -> Any:
+        """
+        Return the move strategy picks for the player to move in game,
+        charging the time taken to their clock; an exception the strategy
+        raises in time is raised here
+        """
+        state = game.current_state
+        player = state.get_current_player_name()
+        limit = self.remaining[player]
+        kwargs = {}
+        if accepts_budget(strategy):
+            kwargs['time_budget'] = self.budget(player, state)
+
+        # the strategy gets its own game object, in case it outlives its
+        # time
+        game_copy = copy.copy(game)
+        started = time.perf_counter()
+        if accepts_stop(strategy):
+            kwargs['stop'] = threading.Event()
+            outcome = self._run_thread(strategy, game_copy, kwargs, limit)
+        elif strategy is not interactive_strategy \
+                and _picklable(strategy, game_copy):
+            outcome = self._run_process(strategy, game_copy, kwargs, limit)
+        else:
+            outcome = self._run_thread(strategy, game_copy, kwargs, limit)
+        seconds = time.perf_counter() - started
+
+        if outcome is not None:
+            kind, move = outcome
+            if kind == 'error':
+                raise move
+            self.remaining[player] += self.increment - seconds
+        elif self.on_timeout == FORFEIT:
+            self.remaining[player] = 0.0
+            raise TimeOut(player)
+        else:
+            move = rough_outcome_strategy(game)
+            self.remaining[player] = self.increment
+        self.move_times.append((player, move, seconds))
+        return move
+
+    @staticmethod
+    def _run_thread(strategy: Callable, game: Any, kwargs: dict,
+                    limit: float) -> Any:
+        """
+        Return what _call finds for strategy, game and kwargs, run in a
+        thread, or None if it takes longer than limit seconds, in which
+        case kwargs' stop, if any, is set and the thread waited for
+        """
+        outcome = []
+        thread = threading.Thread(target=_call,
+                                  args=(strategy, game, kwargs, outcome),
+                                  daemon=True)
+        thread.start()
+        thread.join(max(0.0, limit))
+        if not thread.is_alive():
+            return outcome[0]
+        if 'stop' in kwargs:
+            kwargs['stop'].set()
+            thread.join()
+        return None
+
+    @staticmethod
+    def _run_process(strategy: Callable, game: Any, kwargs: dict,
+                     limit: float) -> Any:
+        """
+        Return what _call finds for strategy, game and kwargs, run in a
+        child process, or None if it takes longer than limit seconds, in
+        which case the process is terminated
+        """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_call_in_child, args=(strategy, game, kwargs, sender),
+            daemon=True)
+        process.start()
+        sender.close()
+        try:
+            if receiver.poll(max(0.0, limit)):
+                return receiver.recv()
+            return None
+        except EOFError:  # the process died without answering
+            process.join()
+            return ('error', RuntimeError(
+                'strategy exited with code {}'.format(process.exitcode)))
+        finally:
+            receiver.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
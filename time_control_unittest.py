@@ -0,0 +1,164 @@
+"""
+Unittests for time_control.py and the clocks in GameInterface.
+"""
+import io
+import multiprocessing
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from game_interface import GameInterface, playable_games
+from strategy import iterative_minimax, rough_outcome_strategy
+from time_control import FORFEIT, TimeControl, TimeOut
+
+SubtractSquareGame = playable_games['s']
+StonehengeGame = playable_games['h']
+
+
+def make_game(value: str):
+    """
+    Return a new SubtractSquareGame starting from value.
+    """
+    with patch('builtins.input', return_value=value):
+        return SubtractSquareGame(True)
+
+
+def make_interface(p1_strategy, p2_strategy, clock):
+    """
+    Return a GameInterface for SubtractSquareGame from 20, p1 first.
+    """
+    with patch('builtins.input', side_effect=['y', '20']):
+        return GameInterface(SubtractSquareGame, p1_strategy, p2_strategy,
+                             clock)
+
+
+def slow_strategy(game):
+    """
+    Return the first possible move, far too late.
+    """
+    time.sleep(1.0)
+    return game.current_state.get_possible_moves()[0]
+
+
+def endless_strategy(game):
+    """
+    Search forever, unless killed.
+    """
+    while True:
+        time.sleep(0.01)
+
+
+def failing_strategy(game):
+    """
+    Fail at once.
+    """
+    raise ValueError('no move')
+
+
+class TimeControlUnitTests(unittest.TestCase):
+    def test_budget_passed_and_clock_charged(self):
+        """
+        Test that a strategy taking time_budget receives one and that the
+        clock is charged the time taken, plus the increment.
+        """
+        budgets = []
+
+        def budgeted(game, time_budget=None):
+            budgets.append(time_budget)
+            return 1
+
+        clock = TimeControl(10.0, 2.0)
+        game = make_game('9')
+        self.assertEqual(clock.choose(budgeted, game), 1)
+        self.assertEqual(budgets, [7.0])
+        self.assertGreater(clock.remaining['p1'], 11.0)
+        self.assertLessEqual(clock.remaining['p1'], 12.0)
+        self.assertEqual(clock.remaining['p2'], 10.0)
+        self.assertEqual([(p, m) for p, m, _ in clock.move_times],
+                         [('p1', 1)])
+
+    def test_timeout_falls_back(self):
+        """
+        Test that a strategy out of time has rough_outcome_strategy's move
+        played instead.
+        """
+        clock = TimeControl(0.2, 0.5)
+        game = make_game('9')
+        self.assertEqual(clock.choose(slow_strategy, game),
+                         rough_outcome_strategy(game))
+        self.assertEqual(clock.remaining['p1'], 0.5)
+
+    def test_strategy_errors_are_raised(self):
+        """
+        Test that an exception raised by a strategy, in a thread or in a
+        child process, is raised by choose rather than taken for a
+        timeout.
+        """
+        def failing_locally(game):
+            raise KeyError('no move')
+
+        clock = TimeControl(10.0)
+        with self.assertRaises(KeyError):
+            clock.choose(failing_locally, make_game('9'))
+        with self.assertRaises(ValueError):
+            clock.choose(failing_strategy, make_game('9'))
+        self.assertEqual(clock.move_times, [])
+
+    def test_timed_out_strategies_are_stopped(self):
+        """
+        Test that strategies out of time are stopped, so that with no
+        increment every later move, each timing out at once, leaves no
+        search running behind it.
+        """
+        running = []
+
+        def stoppable(game, stop=None):
+            running.append(None)
+            stop.wait()
+            running.pop()
+
+        threads = threading.active_count()
+        with patch('builtins.input', return_value='3'):
+            game = StonehengeGame(True)
+        clock = TimeControl(0.1, 0.0)
+        for strategy in (stoppable, endless_strategy, iterative_minimax):
+            for _ in range(3):
+                self.assertEqual(clock.choose(strategy, game),
+                                 rough_outcome_strategy(game))
+                self.assertEqual(clock.remaining['p1'], 0.0)
+                self.assertEqual(running, [])
+                self.assertEqual(multiprocessing.active_children(), [])
+                self.assertEqual(threading.active_count(), threads)
+
+    def test_timeout_forfeits(self):
+        """
+        Test that a strategy out of time under FORFEIT loses the game.
+        """
+        interface = make_interface(slow_strategy, rough_outcome_strategy,
+                                   TimeControl(0.2, on_timeout=FORFEIT))
+        with patch('sys.stdout', new_callable=io.StringIO) as out:
+            interface.play()
+        self.assertIn('p1 ran out of time.', out.getvalue())
+        self.assertIn('Player 2 is the winner!', out.getvalue())
+        with self.assertRaises(TimeOut):
+            TimeControl(0.1, on_timeout=FORFEIT).choose(slow_strategy,
+                                                        make_game('9'))
+
+    def test_timed_game_records_every_move(self):
+        """
+        Test that a game played on the clock records one time per move.
+        """
+        clock = TimeControl(30.0, 1.0)
+        interface = make_interface(rough_outcome_strategy,
+                                   rough_outcome_strategy, clock)
+        with patch('sys.stdout', new_callable=io.StringIO):
+            interface.play()
+        self.assertTrue(interface.game.is_over(interface.game.current_state))
+        self.assertGreater(len(clock.move_times), 1)
+        self.assertEqual(clock.move_times[0][0], 'p1')
+        self.assertEqual(clock.move_times[1][0], 'p2')
+
+
+if __name__ == "__main__":
+    unittest.main()
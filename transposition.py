@@ -0,0 +1,182 @@
+"""
+Transposition tables for the search engines.
+
+An entry holds what a search learned about a position: its value, whether
+that value is exact or only a bound, the depth it was searched to and the
+index of the best move in the position's search_moves() list.
+
+TranspositionTable lives in one process. SharedTranspositionTable keeps
+fixed-size entries in a multiprocessing.shared_memory block so that every
+worker of a parallel search sees every other worker's results. Its entries
+are written without locks: each slot holds the entry's data and the
+position's hash XORed with that data, so a slot torn by two workers
+writing at once no longer matches any position and is simply a miss.
+Every stored entry has its occupied bit set, so no entry encodes to the
+zero of an empty slot.
+"""
+from typing import Any
+from multiprocessing import resource_tracker, shared_memory
+import hashlib
+import sys
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+_NO_MOVE = 0xFFFF
+# data bits: value 0-31, bound 32-33, depth 34-46, occupied 47, move 48-63
+_OCCUPIED = 1 << 47
+_MAX_DEPTH = 0x1FFF
+
+
+def position_hash(key: Any) -> int:
+    """
+    Return a 64-bit hash of a GameState.key() that is the same in every
+    process (unlike hash(), which is salted per process)
+    """
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class TranspositionTable:
+    """
+    A transposition table for a single process.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty table
+        """
+        self._entries = {}
+
+    def probe(self, key: Any) -> Any:
+        """
+        Return (value, bound, depth, move) stored for the position with
+        key, or None
+        """
+        return self._entries.get(key)
+
+    def store(self, key: Any, value: int, bound: int, depth: int,
+              move: Any) -> None:
+        """
+        Record value, its bound type, the depth searched and the index of
+        the best move (or None) for the position with key, unless a deeper
+        result is already stored
+        """
+        old = self._entries.get(key)
+        if old is None or depth >= old[2]:
+            self._entries[key] = (value, bound, depth, move)
+
+    def clear(self) -> None:
+        """
+        Remove every entry
+        """
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries stored
+        """
+        return len(self._entries)
+
+
+class SharedTranspositionTable:
+    """
+    A transposition table in shared memory, usable from several processes
+    at once. Pickling a table (to hand it to a worker) attaches the
+    receiving process to the same block.
+
+    name: the name of the shared memory block
+    size: the number of entries; positions hashing to the same slot
+          replace each other
+    """
+    name: str
+    size: int
+
+    def __init__(self, size: int = 1 << 20, name: str = None) -> None:
+        """
+        Create a table of size entries, or attach to the existing block
+        called name
+        """
+        self.size = size
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True,
+                                                   size=16 * size)
+            self._shm.buf[:] = bytes(16 * size)
+        elif sys.version_info >= (3, 13):
+            # only the creating process should ever unlink the block
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self.name = self._shm.name
+        self._words = self._shm.buf.cast('Q')
+
+    def __getstate__(self) -> tuple:
+        """
+        Return what a worker needs to attach to this table
+        """
+        return self.size, self.name
+
+    def __setstate__(self, state: tuple) -> None:
+        """
+        Attach to the table described by state
+        """
+        self.__init__(*state)
+
+    def probe(self, key: Any) -> Any:
+        """
+        Return (value, bound, depth, move) stored for the position with
+        key, or None
+        """
+        check = position_hash(key)
+        slot = 2 * (check % self.size)
+        data = self._words[slot + 1]
+        if self._words[slot] ^ data != check or not data & _OCCUPIED:
+            return None
+        value = (data & 0xFFFFFFFF) - (1 << 31)
+        bound = (data >> 32) & 0x3
+        depth = (data >> 34) & _MAX_DEPTH
+        move = data >> 48
+        return value, bound, depth, None if move == _NO_MOVE else move
+
+    def store(self, key: Any, value: int, bound: int, depth: int,
+              move: Any) -> None:
+        """
+        Record value, its bound type, the depth searched and the index of
+        the best move (or None) for the position with key, unless a deeper
+        result for it is already stored
+        """
+        check = position_hash(key)
+        slot = 2 * (check % self.size)
+        old = self._words[slot + 1]
+        if self._words[slot] ^ old == check and old & _OCCUPIED \
+                and (old >> 34) & _MAX_DEPTH > depth:
+            return
+        if move is None:
+            move = _NO_MOVE
+        data = ((value + (1 << 31)) & 0xFFFFFFFF) | (bound << 32) \
+            | (min(depth, _MAX_DEPTH) << 34) | _OCCUPIED | (move << 48)
+        self._words[slot] = check ^ data
+        self._words[slot + 1] = data
+
+    def clear(self) -> None:
+        """
+        Remove every entry
+        """
+        self._shm.buf[:] = bytes(16 * self.size)
+
+    def close(self) -> None:
+        """
+        Detach from the table, destroying it if this process created it
+        """
+        self._words.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
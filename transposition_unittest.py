@@ -0,0 +1,88 @@
+"""
+Unittests for the transposition tables in transposition.py.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+import unittest
+
+from transposition import EXACT, LOWER, UPPER, SharedTranspositionTable, \
+    TranspositionTable
+
+
+def fill(table: SharedTranspositionTable, worker: int) -> None:
+    """
+    Store 100 entries from worker in table.
+    """
+    for i in range(100):
+        table.store('{}-{}'.format(worker, i), i - 50, LOWER, worker, i)
+
+
+class TranspositionUnitTests(unittest.TestCase):
+    def test_local_depth_preferred(self):
+        """
+        Test that a shallower result does not replace a deeper one.
+        """
+        table = TranspositionTable()
+        table.store('a', 5, EXACT, 3, 1)
+        table.store('a', 7, LOWER, 2, 0)
+        self.assertEqual(table.probe('a'), (5, EXACT, 3, 1))
+        table.store('a', -9, UPPER, 4, None)
+        self.assertEqual(table.probe('a'), (-9, UPPER, 4, None))
+        self.assertIsNone(table.probe('b'))
+
+    def test_shared_round_trip(self):
+        """
+        Test that entries come back as stored, including negative values
+        and missing moves.
+        """
+        table = SharedTranspositionTable(size=1024)
+        try:
+            table.store('x', -10000, UPPER, 12, None)
+            table.store('y', 10000, EXACT, 0, 25)
+            table.store('w', -(1 << 31), EXACT, 0, 0)
+            self.assertEqual(table.probe('x'), (-10000, UPPER, 12, None))
+            self.assertEqual(table.probe('y'), (10000, EXACT, 0, 25))
+            self.assertEqual(table.probe('w'), (-(1 << 31), EXACT, 0, 0))
+            self.assertIsNone(table.probe('z'))
+        finally:
+            table.close()
+
+    def test_shared_torn_entry_is_a_miss(self):
+        """
+        Test that a slot whose two words do not belong together is
+        ignored.
+        """
+        table = SharedTranspositionTable(size=1)
+        block = shared_memory.SharedMemory(name=table.name)
+        try:
+            table.store('x', 3, EXACT, 1, 2)
+            # flip a bit of the entry's data word, as a torn write would
+            block.buf[13] ^= 1
+            self.assertIsNone(table.probe('x'))
+        finally:
+            block.close()
+            table.close()
+
+    def test_shared_across_processes(self):
+        """
+        Test that entries stored by worker processes are visible to the
+        process that created the table.
+        """
+        table = SharedTranspositionTable(size=1 << 12)
+        try:
+            workers = [multiprocessing.Process(target=fill, args=(table, w))
+                       for w in range(1, 4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            found = sum(table.probe('{}-{}'.format(w, i)) is not None
+                        for w in range(1, 4) for i in range(100))
+            self.assertGreater(found, 250)
+            self.assertEqual(table.probe('2-60'), (10, LOWER, 2, 60))
+        finally:
+            table.close()
+
+
+if __name__ == "__main__":
+    unittest.main()